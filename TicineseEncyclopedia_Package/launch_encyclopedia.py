@@ -2,42 +2,1099 @@
 """
 Ticinese Language Encyclopedia Launcher
 Starts a local web server and opens the encyclopedia in the default browser
+
+Besides the static files, the server answers JSON queries so that thin
+clients only download the page of results they actually show:
+
+    /api/vocab?category=&q=&offset=&limit=
+    /api/stories?category=&q=&offset=&limit=
+    /api/recipes?category=&q=&offset=&limit=
+    /api/scenarios?category=&q=&offset=&limit=
+    /api/<collection>/<id>
+    /api/concordance?word_id=   or   /api/concordance?word=
+
+Query responses are kept in a bounded LRU cache that is dropped for a
+collection as soon as its database file's content hash changes; hit/miss
+counters are available at /api/cache.
+
+/metrics exposes request counts, bytes sent and latency histograms per
+route, open connections, in-flight requests and the response cache in the
+Prometheus text format. --access-log FILE additionally writes a sampled
+JSON line per request (--access-log-sample; client and server errors are
+always kept); the lines are queued and written by a background thread,
+never by the thread serving the request.
+
+The page posts batches of its own timings (database fetch and parse,
+section renders, search keystrokes, long tasks) to /api/telemetry; they
+are aggregated per device into telemetry.json (--telemetry-file) and the
+current aggregates are returned by GET /api/telemetry.
+
+Connections are kept alive (HTTP/1.1) and static files honour single
+byte-range requests, so an interrupted download resumes where it stopped.
+
+Run with --watch while editing database/*.json: changed files are reloaded,
+re-indexed and swapped in without restarting the server.
 """
 
+import argparse
+
+import hashlib
 import http.server
+import json
+import queue
+import random
+import re
 import socketserver
+import unicodedata
 import webbrowser
 import os
 import sys
 import time
-from threading import Thread
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock, Thread
+from urllib.parse import urlsplit, parse_qs
+from urllib.request import urlopen
 
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATABASE_DIR = os.path.join(SCRIPT_DIR, 'database')
 PORT = 8080
+# Each port is its own browser origin with its own saved progress, so the
+# launcher only ever uses these, never a random free port
+PORT_RANGE = range(PORT, PORT + 10)
+PAGE_TITLE = b'Ticinese Language Encyclopedia'
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 200
+
+CACHE_MAX_ENTRIES = 512
+CACHE_MAX_BYTES = 16 * 1024 * 1024
+CACHE_TTL_SECONDS = 300
+
+WATCH_INTERVAL_SECONDS = 0.5
+
+KEEP_ALIVE_TIMEOUT_SECONDS = 15
+COPY_CHUNK_SIZE = 64 * 1024
+
+# Content-hashed files from tools/build_images.py never change under the same URL
+IMMUTABLE_PATH_RE = re.compile(r'^/database/generated/images/[^/]+-[0-9a-f]{10}\.\w+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+LATENCY_QUANTILES = (0.5, 0.95, 0.99)
+
+ACCESS_LOG_QUEUE_SIZE = 10000
+ACCESS_LOG_FLUSH_SECONDS = 1.0
+
+# Browser performance telemetry posted to /api/telemetry
+TELEMETRY_FILE = os.path.join(SCRIPT_DIR, 'telemetry.json')
+TELEMETRY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+TELEMETRY_MAX_BODY = 64 * 1024
+TELEMETRY_MAX_DEVICES = 200
+TELEMETRY_MAX_SERIES = 200  # per device
+TELEMETRY_SAVE_SECONDS = 10
+
+# API collection name -> (database file, list key, id field, fields matched by ?q=)
+COLLECTIONS = {
+    'vocab': ('vocabulary_expanded.json', 'vocabulary', 'word_id',
+              ('ticinese', 'english', 'italian_standard')),
+    'stories': ('stories.json', 'stories', 'story_id',
+                ('title', 'title_english', 'text', 'translation')),
+    'recipes': ('recipes.json', 'recipes', 'recipe_id',
+                ('ticinese_name', 'english_name', 'cultural_significance')),
+    'scenarios': ('scenarios.json', 'scenarios', 'scenario_id',
+                  ('title', 'title_english', 'category')),
+}
+
+# Generated artifacts with their own endpoints -> path under database/
+ARTIFACTS = {
+    'concordance': os.path.join('generated', 'concordance.json'),
+}
+INDEXED_NAMES = tuple(COLLECTIONS) + tuple(ARTIFACTS)
+
+
+class CollectionIndex:
+    """In-memory lookup structures for one database list, built once"""
+
+    def __init__(self, records, id_field, search_fields, signature=None, digest=''):
+        self.records = records
+        self.signature = signature
+        self.digest = digest
+        self.by_id = {}
+        self.duplicate_ids = []
+        self.by_category = {}
+        self.search_text = []
+
+        for position, record in enumerate(records):
+            # The first record with an id wins, as in the list order (and vocabulary_matcher)
+            record_id = record.get(id_field)
+            if record_id in self.by_id:
+                self.duplicate_ids.append(record_id)
+            else:
+                self.by_id[record_id] = position
+            category = record.get('category') or 'uncategorized'
+            self.by_category.setdefault(category, []).append(position)
+            # Same case-insensitive substring semantics as getFilteredWords()
+            self.search_text.append('\x00'.join(
+                str(record.get(field) or '').lower() for field in search_fields
+            ))
+
+        self.all_positions = list(range(len(records)))
+
+    def get(self, record_id):
+        position = self.by_id.get(record_id)
+        return None if position is None else self.records[position]
+
+    def query(self, category='', q='', offset=0, limit=DEFAULT_PAGE_SIZE):
+        """Return one page of matching records plus the total match count"""
+        if category and category != 'all':
+            positions = self.by_category.get(category, [])
+        else:
+            positions = self.all_positions
+
+        if q:
+            q = q.lower()
+            positions = [p for p in positions if q in self.search_text[p]]
+
+        page = positions[offset:offset + limit]
+        return {
+            'total': len(positions),
+            'offset': offset,
+            'limit': limit,
+            'items': [self.records[p] for p in page],
+        }
+
+
+class ConcordanceIndex:
+    """Word occurrences across the corpus, from tools/build_concordance.py"""
+
+    def __init__(self, data, signature=None, digest=''):
+        self.signature = signature
+        self.digest = digest
+        self.documents = data.get('documents', [])
+        self.postings = data.get('postings', {})
+        self.frequency = data.get('frequency', {})
+        self.forms = data.get('forms', {})
+
+    def resolve(self, word):
+        """word_ids spelled like word"""
+        folded = unicodedata.normalize('NFC', word).strip().lower().replace('\u2019', "'")
+        return self.forms.get(folded, [])
+
+    def lookup(self, word_id):
+        occurrences = []
+        for doc_index, start, end in self.postings.get(word_id, []):
+            kind, doc_id, field, title = self.documents[doc_index]
+            occurrences.append({'kind': kind, 'id': doc_id, 'field': field,
+                                'title': title, 'start': start, 'end': end})
+        return {
+            'word_id': word_id,
+            'frequency': self.frequency.get(word_id, {}),
+            'occurrences': occurrences,
+        }
+
+
+def file_signature(path):
+    """Cheap change detector: (mtime, size), or None when the file is missing"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def index_filename(name):
+    return COLLECTIONS[name][0] if name in COLLECTIONS else ARTIFACTS[name]
+
+
+def build_index(name):
+    """Load one database file and index it; missing files give an empty index"""
+    path = os.path.join(DATABASE_DIR, index_filename(name))
+    signature = file_signature(path)
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw.decode('utf-8'))
+        digest = hashlib.sha256(raw).hexdigest()
+    except FileNotFoundError:
+        data, digest = {}, ''
+
+    if name in ARTIFACTS:
+        return ConcordanceIndex(data, signature=signature, digest=digest)
+    filename, list_key, id_field, search_fields = COLLECTIONS[name]
+    index = CollectionIndex(data.get(list_key, []), id_field, search_fields,
+                            signature=signature, digest=digest)
+    if index.duplicate_ids:
+        duplicates = sorted(set(index.duplicate_ids))
+        print(f"Warning: {filename} has duplicate {id_field}s ({', '.join(duplicates[:5])}"
+              f"{', ...' if len(duplicates) > 5 else ''}); /api/{name}/<id> returns the first record with each")
+    return index
+
+
+def empty_index(name):
+    if name in ARTIFACTS:
+        return ConcordanceIndex({})
+    _, _, id_field, search_fields = COLLECTIONS[name]
+    return CollectionIndex([], id_field, search_fields)
+
+
+def load_index(name):
+    """build_index() for startup: a file that fails to load gives an empty index
+
+    The empty index has no signature, so the next request (or --watch check)
+    retries the file and picks it up once it is fixed.
+    """
+    try:
+        return build_index(name)
+    except Exception as e:
+        print(f"Warning: could not load {index_filename(name)} ({e!r}); serving it empty until it is fixed")
+        return empty_index(name)
+
+
+def build_indexes():
+    """Index every API collection, parsing the files concurrently"""
+    with ThreadPoolExecutor(max_workers=len(INDEXED_NAMES)) as pool:
+        return dict(zip(INDEXED_NAMES, pool.map(load_index, INDEXED_NAMES)))
+
+
+def preload_indexes():
+    """Build the indexes in the background while the server starts and the browser opens
+
+    INDEXES_READY is set whatever happens, since API requests and the watcher wait on it.
+    """
+    try:
+        INDEXES.update(build_indexes())
+    finally:
+        for name in INDEXED_NAMES:
+            INDEXES.setdefault(name, empty_index(name))
+        INDEXES_READY.set()
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of encoded API responses with a TTL and byte budget"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES,
+                 ttl=CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (expires_at, body)
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._discard(key)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._discard(key)
+            self.entries[key] = (time.monotonic() + self.ttl, body)
+            self.size_bytes += len(body)
+            while len(self.entries) > self.max_entries or self.size_bytes > self.max_bytes:
+                self._discard(next(iter(self.entries)))
+                self.evictions += 1
+
+    def invalidate(self, collection):
+        """Drop every cached response computed from one collection"""
+        with self.lock:
+            for key in [k for k in self.entries if k[0] == collection]:
+                self._discard(key)
+
+    def _discard(self, key):
+        _, body = self.entries.pop(key)
+        self.size_bytes -= len(body)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.size_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def route_label(path, status):
+    """Bounded label for a request path: API routes and served files, not raw URLs"""
+    if path == '/metrics':
+        return path
+    if path.startswith('/api/'):
+        parts = path[len('/api/'):].strip('/').split('/')
+        if parts[0] in COLLECTIONS and len(parts) <= 2:
+            return f'/api/{parts[0]}' + ('/{id}' if len(parts) == 2 else '')
+        if parts in (['cache'], ['concordance'], ['telemetry']):
+            return f'/api/{parts[0]}'
+        return '/api/unknown'
+    # Only existing files become labels; 404s for arbitrary paths share one
+    return path if status in (200, 206, 304) else 'other'
+
+
+def histogram_quantile(bounds, counts, q):
+    """Estimate a quantile from bucket counts, interpolating inside the bucket
+
+    counts has one entry per bound plus a last one for values above them all.
+    """
+    rank = q * sum(counts)
+    seen = 0
+    for i, count in enumerate(counts):
+        if count and seen + count >= rank:
+            if i == len(bounds):
+                return bounds[-1]
+            lower = bounds[i - 1] if i else 0.0
+            return lower + (bounds[i] - lower) * (rank - seen) / count
+        seen += count
+    return 0.0
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RequestMetrics:
+    """Per-route counters and latency histograms, cheap enough to update on every request"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.requests = {}    # (route, status) -> count
+        self.bytes_sent = {}  # route -> bytes
+        self.latency = {}     # route -> [bucket counts..., +Inf count, sum of seconds]
+        self.connections_open = 0
+        self.requests_in_flight = 0
+        self.access_log_dropped = 0
+        self.lock = Lock()
+
+    def connection_opened(self):
+        with self.lock:
+            self.connections_open += 1
+
+    def connection_closed(self):
+        with self.lock:
+            self.connections_open -= 1
+
+    def request_started(self):
+        with self.lock:
+            self.requests_in_flight += 1
+
+    def request_finished(self, route, status, size, seconds):
+        bucket = bisect_left(self.buckets, seconds)
+        with self.lock:
+            self.requests_in_flight -= 1
+            key = (route, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.bytes_sent[route] = self.bytes_sent.get(route, 0) + size
+            histogram = self.latency.get(route)
+            if histogram is None:
+                histogram = self.latency[route] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[bucket] += 1
+            histogram[-1] += seconds
+
+    def render(self, cache_stats):
+        """All metrics in the Prometheus text exposition format"""
+        with self.lock:
+            requests = dict(self.requests)
+            bytes_sent = dict(self.bytes_sent)
+            latency = {route: list(histogram) for route, histogram in self.latency.items()}
+            gauges = (self.connections_open, self.requests_in_flight, self.access_log_dropped)
+
+        lines = [
+            '# HELP ticinese_http_requests_total Requests served, by route and status code.',
+            '# TYPE ticinese_http_requests_total counter',
+        ]
+        for (route, status), count in sorted(requests.items()):
+            lines.append(f'ticinese_http_requests_total{{route="{escape_label(route)}",code="{status}"}} {count}')
+
+        lines += [
+            '# HELP ticinese_http_response_bytes_total Bytes written (headers and body), by route.',
+            '# TYPE ticinese_http_response_bytes_total counter',
+        ]
+        for route, size in sorted(bytes_sent.items()):
+            lines.append(f'ticinese_http_response_bytes_total{{route="{escape_label(route)}"}} {size}')
+
+        lines += [
+            '# HELP ticinese_http_request_duration_seconds Time from request line to last byte.',
+            '# TYPE ticinese_http_request_duration_seconds histogram',
+        ]
+        for route, histogram in sorted(latency.items()):
+            label = escape_label(route)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), histogram[:-1]):
+                cumulative += count
+                lines.append(f'ticinese_http_request_duration_seconds_bucket{{route="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'ticinese_http_request_duration_seconds_sum{{route="{label}"}} {histogram[-1]:.6f}')
+            lines.append(f'ticinese_http_request_duration_seconds_count{{route="{label}"}} {cumulative}')
+
+        lines += [
+            '# HELP ticinese_http_request_latency_seconds Latency quantiles estimated from the histogram.',
+            '# TYPE ticinese_http_request_latency_seconds gauge',
+        ]
+        for route, histogram in sorted(latency.items()):
+            for q in LATENCY_QUANTILES:
+                lines.append(f'ticinese_http_request_latency_seconds{{route="{escape_label(route)}",quantile="{q}"}} '
+                             f'{histogram_quantile(self.buckets, histogram[:-1], q):.6f}')
+
+        connections, in_flight, dropped = gauges
+        lines += [
+            '# HELP ticinese_http_connections_open Client connections currently open.',
+            '# TYPE ticinese_http_connections_open gauge',
+            f'ticinese_http_connections_open {connections}',
+            '# HELP ticinese_http_requests_in_flight Requests currently being served.',
+            '# TYPE ticinese_http_requests_in_flight gauge',
+            f'ticinese_http_requests_in_flight {in_flight}',
+            '# HELP ticinese_access_log_dropped_total Access log lines dropped because the queue was full.',
+            '# TYPE ticinese_access_log_dropped_total counter',
+            f'ticinese_access_log_dropped_total {dropped}',
+        ]
+        for name, kind, help_text in (
+                ('hits', 'counter', 'API responses served from the cache.'),
+                ('misses', 'counter', 'API responses computed because they were not cached.'),
+                ('evictions', 'counter', 'Cached responses evicted for space.'),
+                ('entries', 'gauge', 'Responses currently cached.'),
+                ('bytes', 'gauge', 'Bytes of cached responses.'),
+                ('hit_ratio', 'gauge', 'hits / (hits + misses) since start.')):
+            metric = f'ticinese_response_cache_{name}' + ('_total' if kind == 'counter' else '')
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} {kind}',
+                      f'{metric} {cache_stats[name]}']
+        return '\n'.join(lines) + '\n'
+
+
+class AccessLogWriter(Thread):
+    """Writes sampled access log records as JSON lines from a background thread"""
+
+    def __init__(self, path, sample_rate=1.0):
+        super().__init__(daemon=True)
+        self.path = path
+        self.sample_rate = sample_rate
+        self.records = queue.Queue(maxsize=ACCESS_LOG_QUEUE_SIZE)
+
+    def submit(self, record):
+        """Queue a record without blocking; 4xx and 5xx are always kept, the rest sampled"""
+        if record['status'] < 400 and random.random() >= self.sample_rate:
+            return
+        try:
+            self.records.put_nowait(record)
+        except queue.Full:
+            with METRICS.lock:
+                METRICS.access_log_dropped += 1
+
+    def run(self):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            while True:
+                try:
+                    record = self.records.get(timeout=ACCESS_LOG_FLUSH_SECONDS)
+                except queue.Empty:
+                    f.flush()
+                    continue
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def device_label(device):
+    """Short, stable name for the device that sent a telemetry batch"""
+    agent = str(device.get('userAgent', ''))
+    # The parenthesised part of a user agent names the platform: "iPad; CPU OS 17_1 ..."
+    platform_text = agent[agent.find('(') + 1:agent.find(')')] if '(' in agent else agent
+    return f"{platform_text[:80]} {str(device.get('screen', ''))[:20]}".strip() or 'unknown'
+
+
+class TelemetryStore:
+    """Aggregates browser timings per device and series, persisted to a JSON file
+
+    A series is "<type> <name>", e.g. "fetch database/stories.json" or
+    "render displayRecipeList"; each keeps a count, sum, min, max and a
+    histogram over TELEMETRY_BUCKETS_MS from which the quantiles are read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.devices = {}
+        self.dirty = False
+        self.lock = Lock()
+        self.save_lock = Lock()           # one writer of <path>.tmp at a time
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.devices = json.load(f).get('devices', {})
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def add_batch(self, batch):
+        """Fold one beacon into the aggregates; raises ValueError when malformed"""
+        device = batch.get('device')
+        samples = batch.get('samples')
+        if not isinstance(device, dict) or not isinstance(samples, list):
+            raise ValueError('expected {"device": {...}, "samples": [...]}')
+        label = device_label(device)
+        with self.lock:
+            entry = self.devices.get(label)
+            if entry is None:
+                if len(self.devices) >= TELEMETRY_MAX_DEVICES:
+                    return 0
+                entry = self.devices[label] = {'info': {}, 'batches': 0, 'series': {}}
+            entry['info'] = {key: device[key] for key in sorted(device) if key != 'userAgent'}
+            entry['info']['userAgent'] = str(device.get('userAgent', ''))
+            entry['last_seen'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+            entry['batches'] += 1
+            added = 0
+            for sample in samples:
+                try:
+                    kind, name, value = sample
+                    value = float(value)
+                except (TypeError, ValueError):
+                    continue
+                if value < 0:
+                    continue
+                key = f'{str(kind)[:20]} {str(name)[:100]}'
+                series = entry['series'].get(key)
+                if series is None:
+                    if len(entry['series']) >= TELEMETRY_MAX_SERIES:
+                        continue
+                    series = entry['series'][key] = {
+                        'count': 0, 'sum_ms': 0.0, 'min_ms': value, 'max_ms': value,
+                        'buckets': [0] * (len(TELEMETRY_BUCKETS_MS) + 1)}
+                series['count'] += 1
+                series['sum_ms'] += value
+                series['min_ms'] = min(series['min_ms'], value)
+                series['max_ms'] = max(series['max_ms'], value)
+                series['buckets'][bisect_left(TELEMETRY_BUCKETS_MS, value)] += 1
+                added += 1
+            self.dirty = True
+        return added
+
+    def snapshot(self):
+        """The aggregates with mean and p50/p95/p99 filled in"""
+        with self.lock:
+            devices = json.loads(json.dumps(self.devices))
+        for entry in devices.values():
+            for series in entry['series'].values():
+                series['mean_ms'] = round(series['sum_ms'] / series['count'], 3)
+                for q in LATENCY_QUANTILES:
+                    estimate = histogram_quantile(TELEMETRY_BUCKETS_MS, series['buckets'], q)
+                    series[f'p{round(q * 100)}_ms'] = round(
+                        min(max(estimate, series['min_ms']), series['max_ms']), 3)
+        return {'bucket_bounds_ms': TELEMETRY_BUCKETS_MS, 'devices': devices}
+
+    def save(self):
+        """Write the aggregates if they changed, replacing the file atomically
+
+        The writer thread and the exit handler may both call this; save_lock
+        keeps them from writing the temporary file at the same time, while
+        beacons keep arriving under the store's own lock.
+        """
+        with self.save_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                self.dirty = False
+            payload = self.snapshot()
+            payload['updated'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+            temporary = self.path + '.tmp'
+            with open(temporary, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False, indent=2)
+            os.replace(temporary, self.path)
+
+
+class TelemetryWriter(Thread):
+    """Saves the telemetry aggregates every few seconds, off the request threads"""
+
+    def __init__(self, store, interval=TELEMETRY_SAVE_SECONDS):
+        super().__init__(daemon=True)
+        self.store = store
+        self.interval = interval
+        self.stopped = Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.store.save()
+        self.store.save()
+
+    def stop(self):
+        self.stopped.set()
+
+
+REBUILD_LOCK = Lock()
+
+
+def refresh_index(name):
+    """Rebuild a collection's index if its file changed and swap it in atomically
+
+    Returns (index, reloaded). A file caught half-written by an editor, or one
+    that is not shaped like the collection (a top-level list, a missing or
+    mistyped list key), fails to load; the previous index keeps serving, a
+    warning is printed once per version of the file and the next check retries.
+    """
+    index = INDEXES[name]
+    path = os.path.join(DATABASE_DIR, index_filename(name))
+    if file_signature(path) == index.signature:
+        return index, False
+
+    with REBUILD_LOCK:
+        index = INDEXES[name]
+        if file_signature(path) == index.signature:
+            return index, False
+        signature = file_signature(path)
+        try:
+            fresh = build_index(name)
+        except Exception as e:
+            if signature != getattr(index, 'rejected_signature', None):
+                index.rejected_signature = signature
+                print(f"Warning: could not reload {index_filename(name)} ({e!r}); "
+                      f"still serving the previous version")
+            return index, False
+        if fresh.digest == index.digest:
+            index.signature = fresh.signature
+            return index, False
+        INDEXES[name] = fresh
+        RESPONSE_CACHE.invalidate(name)
+        return fresh, True
+
+
+def current_index(name):
+    """Return the index for a collection, rebuilding it if the file's hash changed"""
+    if name not in INDEXES:
+        return None
+    return refresh_index(name)[0]
+
+
+class DatabaseWatcher(Thread):
+    """Polls the database files and hot-swaps the index of any that changed"""
+
+    def __init__(self, interval=WATCH_INTERVAL_SECONDS):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.stopped = Event()
+
+    def run(self):
+        INDEXES_READY.wait()
+        while not self.stopped.wait(self.interval):
+            for name in INDEXED_NAMES:
+                try:
+                    if refresh_index(name)[1]:
+                        print(f"Reloaded {index_filename(name)}")
+                except Exception as e:  # Keep watching the other files and later edits
+                    print(f"Warning: checking {index_filename(name)} failed: {e!r}")
+
+    def stop(self):
+        self.stopped.set()
+
+
+def cache_key(collection, digest, params, offset, limit):
+    """Normalize a query so equivalent requests share one cache entry"""
+    category = params.get('category', [''])[0].strip().lower()
+    q = ' '.join(params.get('q', [''])[0].lower().split())
+    return (collection, digest, category or 'all', q, offset, limit)
+
+
+INDEXES = {}
+INDEXES_READY = Event()
+SERVER_READY = Event()
+server_url = f'http://localhost:{PORT}'
+RESPONSE_CACHE = ResponseCache()
+METRICS = RequestMetrics()
+ACCESS_LOG = None
+TELEMETRY = None
+
+
+def parse_page_args(params):
+    """Read offset/limit from a query string, raising ValueError when invalid"""
+    offset = int(params.get('offset', ['0'])[0] or 0)
+    limit = int(params.get('limit', [str(DEFAULT_PAGE_SIZE)])[0] or DEFAULT_PAGE_SIZE)
+    if offset < 0 or limit < 1:
+        raise ValueError('offset must be >= 0 and limit >= 1')
+    return offset, min(limit, MAX_PAGE_SIZE)
+
+
+def encode_json(payload):
+    return json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+
+def parse_byte_range(header, size):
+    """Turn a Range header into an inclusive (start, end) pair
+
+    Returns None when the header should be ignored (not bytes, several ranges
+    or malformed) and raises ValueError when the range cannot be satisfied.
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, dash, last = spec.strip().partition('-')
+    if not dash or not (first or last):
+        return None
+    if (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+    if size == 0:
+        raise ValueError('file is empty')
+    if not first:
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError('empty suffix range')
+        return max(size - suffix, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size:
+        raise ValueError('range starts past the end of the file')
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+class CountingWriter:
+    """Wraps the connection's writer to count the bytes sent"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_written = 0
+
+    def write(self, data):
+        self.bytes_written += len(data)
+        return self.raw.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
 
 class QuietHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     """HTTP request handler that doesn't print every request"""
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEP_ALIVE_TIMEOUT_SECONDS  # Close idle keep-alive connections
+    # Headers and body go out in separate writes; without TCP_NODELAY the body
+    # waits for the client's delayed ACK (~40 ms per request on keep-alive)
+    disable_nagle_algorithm = True
+
     def log_message(self, format, *args):
-        pass  # Suppress console output
+        pass  # Suppress console output; requests are counted in METRICS instead
+
+    def setup(self):
+        super().setup()
+        self.wfile = CountingWriter(self.wfile)
+        METRICS.connection_opened()
+
+    def finish(self):
+        try:
+            super().finish()
+        finally:
+            METRICS.connection_closed()
+
+    def parse_request(self):
+        # Timed from here: waiting for the next request on an idle keep-alive
+        # connection is not latency
+        self.request_started = time.perf_counter()
+        self.status_code = 0
+        self.path = ''  # A malformed request line leaves the previous request's path otherwise
+        self.bytes_before = self.wfile.bytes_written
+        METRICS.request_started()
+        return super().parse_request()
+
+    def log_request(self, code='-', size='-'):
+        self.status_code = int(code)
+
+    def handle_one_request(self):
+        self.request_started = None
+        try:
+            super().handle_one_request()
+        finally:
+            if self.request_started is not None:
+                self.record_request()
+
+    def record_request(self):
+        seconds = time.perf_counter() - self.request_started
+        size = self.wfile.bytes_written - self.bytes_before
+        raw_path = getattr(self, 'path', '') or ''
+        path = urlsplit(raw_path).path if raw_path else ''
+        route = route_label(path, self.status_code)
+        METRICS.request_finished(route, self.status_code, size, seconds)
+        if ACCESS_LOG is not None:
+            ACCESS_LOG.submit({
+                'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+                'client': self.client_address[0],
+                'method': self.command,
+                'path': raw_path,
+                'route': route,
+                'status': self.status_code,
+                'bytes': size,
+                'duration_ms': round(seconds * 1000, 3),
+            })
+
+    def send_head(self):
+        """Serve a 206 partial response for single byte ranges on plain files"""
+        self.range_remaining = None
+        path = self.translate_path(self.path)
+        self.accepts_ranges = os.path.isfile(path) and not urlsplit(self.path).path.endswith('/')
+        self.immutable = self.accepts_ranges and bool(IMMUTABLE_PATH_RE.match(urlsplit(self.path).path))
+        range_header = self.headers.get('Range')
+        if not self.accepts_ranges or not range_header:
+            return super().send_head()
+
+        f = open(path, 'rb')
+        fs = os.fstat(f.fileno())
+        last_modified = self.date_time_string(fs.st_mtime)
+        if_range = self.headers.get('If-Range')
+        try:
+            byte_range = None
+            if if_range is None or if_range == last_modified:
+                byte_range = parse_byte_range(range_header, fs.st_size)
+        except ValueError:
+            f.close()
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{fs.st_size}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+        if byte_range is None:
+            f.close()
+            return super().send_head()
+
+        start, end = byte_range
+        self.send_response(206)
+        self.send_header('Content-Type', self.guess_type(path))
+        self.send_header('Content-Range', f'bytes {start}-{end}/{fs.st_size}')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Last-Modified', last_modified)
+        self.end_headers()
+        f.seek(start)
+        self.range_remaining = end - start + 1
+        return f
+
+    def end_headers(self):
+        if getattr(self, 'accepts_ranges', False):
+            self.send_header('Accept-Ranges', 'bytes')
+            self.accepts_ranges = False
+        if getattr(self, 'immutable', False):
+            self.send_header('Cache-Control', IMMUTABLE_CACHE_CONTROL)
+            self.immutable = False
+        super().end_headers()
+
+    def copyfile(self, source, outputfile):
+        """Stream the file (or the requested range) in fixed-size chunks"""
+        remaining = self.range_remaining
+        while remaining is None or remaining > 0:
+            size = COPY_CHUNK_SIZE if remaining is None else min(COPY_CHUNK_SIZE, remaining)
+            chunk = source.read(size)
+            if not chunk:
+                break
+            outputfile.write(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/metrics':
+            self.send_body(METRICS.render(RESPONSE_CACHE.stats()).encode('utf-8'),
+                           content_type='text/plain; version=0.0.4; charset=utf-8')
+        elif url.path.startswith('/api/'):
+            self.handle_api(url)
+        else:
+            super().do_GET()
+
+    def handle_api(self, url):
+        """Answer /api/<collection> and /api/<collection>/<id> queries"""
+        parts = url.path[len('/api/'):].strip('/').split('/')
+        if parts == ['cache']:
+            self.send_json(RESPONSE_CACHE.stats())
+            return
+        if parts == ['telemetry']:
+            if TELEMETRY is None:
+                self.send_json({'error': 'Telemetry is disabled'}, 404)
+            else:
+                self.send_json(TELEMETRY.snapshot())
+            return
 
-def start_server():
+        INDEXES_READY.wait()
+        if parts == ['concordance']:
+            self.handle_concordance(parse_qs(url.query))
+            return
+
+        index = current_index(parts[0]) if parts[0] in COLLECTIONS else None
+        if index is None or len(parts) > 2:
+            self.send_json({'error': f'Unknown API path: {url.path}'}, 404)
+            return
+
+        if len(parts) == 2:
+            record = index.get(parts[1])
+            if record is None:
+                self.send_json({'error': f'No {parts[0]} entry with id {parts[1]}'}, 404)
+            else:
+                self.send_json(record)
+            return
+
+        params = parse_qs(url.query)
+        try:
+            offset, limit = parse_page_args(params)
+        except ValueError as e:
+            self.send_json({'error': f'Invalid paging parameters: {e}'}, 400)
+            return
+
+        key = cache_key(parts[0], index.digest, params, offset, limit)
+        body = RESPONSE_CACHE.get(key)
+        if body is None:
+            _, _, category, q, _, _ = key
+            body = encode_json(index.query(category=category, q=q,
+                                           offset=offset, limit=limit))
+            RESPONSE_CACHE.put(key, body)
+        self.send_body(body)
+
+    def do_POST(self):
+        """Accept telemetry beacons; there is nothing else to post
+
+        Every response sent without reading the body closes the connection:
+        on keep-alive the unread body would be parsed as the next request.
+        """
+        if urlsplit(self.path).path != '/api/telemetry' or TELEMETRY is None:
+            self.close_connection = True
+            self.send_json({'error': f'Cannot POST to {self.path}'}, 404)
+            return
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            self.close_connection = True
+            self.send_json({'error': 'Content-Length required'}, 411)
+            return
+        if length < 0:
+            self.close_connection = True
+            self.send_json({'error': 'Invalid Content-Length'}, 400)
+            return
+        if length > TELEMETRY_MAX_BODY:
+            self.close_connection = True
+            self.send_json({'error': 'Telemetry batch too large'}, 413)
+            return
+        try:
+            TELEMETRY.add_batch(json.loads(self.rfile.read(length).decode('utf-8')))
+        except (UnicodeDecodeError, ValueError, AttributeError) as e:
+            self.send_json({'error': f'Invalid telemetry batch: {e}'}, 400)
+            return
+        self.send_response(204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def handle_concordance(self, params):
+        """Occurrences of one word, by word_id or by Ticinese spelling"""
+        index = current_index('concordance')
+        word_id = params.get('word_id', [''])[0]
+        word = params.get('word', [''])[0]
+        if not word_id and not word:
+            self.send_json({'error': 'Pass word_id= or word='}, 400)
+            return
+
+        key = ('concordance', index.digest, word_id, word.strip().lower())
+        body = RESPONSE_CACHE.get(key)
+        if body is None:
+            word_ids = [word_id] if word_id else index.resolve(word)
+            body = encode_json({'words': [index.lookup(w) for w in word_ids]})
+            RESPONSE_CACHE.put(key, body)
+        self.send_body(body)
+
+    def send_json(self, payload, status=200):
+        self.send_body(encode_json(payload), status)
+
+    def send_body(self, body, status=200, content_type='application/json; charset=utf-8'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class EncyclopediaServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """One thread per connection so a kept-alive tablet doesn't block the others"""
+    daemon_threads = True
+    # Rebind 8080 right after a restart (TIME_WAIT) instead of moving to another
+    # origin; on Windows SO_REUSEADDR would let a second launcher share the port
+    allow_reuse_address = os.name != 'nt'
+
+def encyclopedia_running(port):
+    """True when the page served on port is this encyclopedia"""
+    try:
+        with urlopen(f'http://localhost:{port}/index.html', timeout=2) as response:
+            return PAGE_TITLE in response.read(4096)
+    except (OSError, ValueError):
+        return False
+
+def bind_server(ports=PORT_RANGE):
+    """Bind the first free port of PORT_RANGE
+
+    Returns (server, None), or (None, url) when a port is taken by an
+    encyclopedia that is already running, so the browser goes back to it
+    (and to the progress saved for that origin) instead of a new one.
+    """
+    for port in ports:
+        try:
+            return EncyclopediaServer(("", port), QuietHTTPRequestHandler), None
+        except OSError:
+            if encyclopedia_running(port):
+                return None, f'http://localhost:{port}'
+            print(f"Port {port} is used by another program, trying the next one.")
+    sys.exit(f"Ports {ports[0]}-{ports[-1]} are all in use; close another program and start again.")
+
+def start_server(watch=False, access_log=None, access_log_sample=1.0, telemetry_file=TELEMETRY_FILE):
     """Start the HTTP server"""
+    global server_url, ACCESS_LOG, TELEMETRY
     os.chdir(SCRIPT_DIR)
+    httpd, running_url = bind_server()
+    if httpd is None:
+        print(f"The encyclopedia is already running on {running_url}; opening it.")
+        webbrowser.open(f'{running_url}/index.html')
+        return
+
+    if telemetry_file:
+        TELEMETRY = TelemetryStore(os.path.abspath(telemetry_file))
+        TelemetryWriter(TELEMETRY).start()
+    if access_log:
+        ACCESS_LOG = AccessLogWriter(os.path.abspath(access_log), access_log_sample)
+        ACCESS_LOG.start()
+    Thread(target=preload_indexes, daemon=True).start()
+    if watch:
+        DatabaseWatcher().start()
+        print("Watching database/*.json for changes...")
 
-    with socketserver.TCPServer(("", PORT), QuietHTTPRequestHandler) as httpd:
+    with httpd:
+        server_url = f'http://localhost:{httpd.server_address[1]}'
+        SERVER_READY.set()
         print(f"Ticinese Encyclopedia is running...")
-        print(f"Server started on http://localhost:{PORT}")
+        print(f"Server started on {server_url}")
         print("\nYou can close this window when you're done using the encyclopedia.")
-        print("The browser window will open automatically in a few seconds...\n")
+        print("The browser window is opening now...\n")
         httpd.serve_forever()
 
 def open_browser():
-    """Wait a moment then open the browser"""
-    time.sleep(2)
-    webbrowser.open(f'http://localhost:{PORT}/index.html')
+    """Open the browser as soon as the server is accepting connections"""
+    SERVER_READY.wait()
+    webbrowser.open(f'{server_url}/index.html')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ticinese Language Encyclopedia launcher")
+    parser.add_argument('--watch', action='store_true',
+                        help="reload database files as soon as they are edited")
+    parser.add_argument('--access-log', metavar='FILE',
+                        help="append a JSON line per request to FILE")
+    parser.add_argument('--access-log-sample', type=float, default=1.0, metavar='RATE',
+                        help="fraction of requests to log (4xx and 5xx are always logged)")
+    parser.add_argument('--telemetry-file', default=TELEMETRY_FILE, metavar='FILE',
+                        help="where browser performance telemetry is aggregated")
+    parser.add_argument('--no-telemetry', action='store_true',
+                        help="ignore telemetry beacons from the browser")
+    return parser.parse_args()
 
 if __name__ == '__main__':
+    args = parse_args()
+
     # Start browser opener in separate thread
     browser_thread = Thread(target=open_browser)
     browser_thread.daemon = True
@@ -45,14 +1102,11 @@ if __name__ == '__main__':
 
     # Start server (blocking)
     try:
-        start_server()
+        start_server(watch=args.watch, access_log=args.access_log,
+                     access_log_sample=args.access_log_sample,
+                     telemetry_file=None if args.no_telemetry else args.telemetry_file)
     except KeyboardInterrupt:
+        if TELEMETRY is not None:
+            TELEMETRY.save()
         print("\n\nEncyclopedia closed. Thank you for using the Ticinese Encyclopedia!")
         sys.exit(0)
-    except OSError as e:
-        if "Address already in use" in str(e):
-            print(f"\nPort {PORT} is already in use. The encyclopedia may already be running.")
-            print("Check if you have another browser window open with the encyclopedia.")
-            input("\nPress Enter to exit...")
-        else:
-            raise
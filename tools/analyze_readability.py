@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Measure readability and level fit of the stories and recipes.
+
+Each document (a story's text; a recipe's instructions) is tokenized once
+into a Counter of word types, and every metric is a sum over that Counter:
+
+    tokens, types            running words and distinct words
+    type_token_ratio         types / tokens
+    vocabulary_coverage      share of tokens the vocabulary knows
+    a1_coverage              share of tokens in the A1 core lexicon
+    oov_rate                 share of types the vocabulary does not know
+    estimated_level          CEFR band implied by a1_coverage
+
+The A1 core lexicon is what the A1 material itself teaches (the focus words
+of A1 stories and the vocabulary lists of A1 recipes) plus the words the
+concordance measured as common, restricted to tokens the vocabulary knows
+(recipe lists are partly Italian). A document is scored without its own
+focus list, so an A1 story is not graded against the words it teaches and
+a1_coverage never exceeds vocabulary_coverage. The metrics are written back to
+stories.json and recipes.json as a `metrics` field on each record, one
+line after the id, without reformatting the hand-edited files.
+
+--known takes a learner's known words (a JSON list of word_ids, or the
+progress object saved by the spaced repetition engine, where a word is
+known once reviewed at level KNOWN_LEVEL or above, as in the page's
+recommender) and adds their coverage of every document to the report; it
+is not written back.
+"""
+
+import argparse
+import sys
+from collections import Counter
+
+from corpus import (DATABASE_DIR, database_path, load_database, load_json,
+                    phrase_key, tokenize, write_record_field)
+
+CORE_LEVEL = 'A1'
+# Spaced repetition level from which a reviewed word counts as known (ContentRecommender.knownLevel)
+KNOWN_LEVEL = 1
+
+# Minimum A1 core coverage for each estimated level, easiest first
+LEVEL_BANDS = (('A1', 0.6), ('A2', 0.45), ('B1', 0.3), ('B2', 0.0))
+
+
+def lexicon_tokens(phrases):
+    """Every token of every phrase, as a set"""
+    tokens = set()
+    for phrase in phrases:
+        tokens.update(phrase_key(phrase))
+    return tokens
+
+
+def vocabulary_tokens(vocabulary):
+    phrases = []
+    for word in vocabulary:
+        phrases.append(word['ticinese'])
+        phrases.extend(word.get('regional_variants') or [])
+    return lexicon_tokens(phrases)
+
+
+def core_lexicon(stories, recipes, vocabulary, lexicon, skip=None):
+    """Known tokens of the A1 core lexicon, leaving out the focus list of document `skip`"""
+    phrases = []
+    for story in stories:
+        if story.get('level') == CORE_LEVEL and ('story', story['story_id']) != skip:
+            phrases.extend(focus['ticinese'] for focus in story.get('vocabulary_focus', []))
+    for recipe in recipes:
+        if recipe.get('difficulty_level') == CORE_LEVEL and ('recipe', recipe['recipe_id']) != skip:
+            for terms in recipe.get('vocabulary_learning', {}).values():
+                phrases.extend(terms)
+    phrases.extend(word['ticinese'] for word in vocabulary if word.get('frequency') == 'common')
+    return lexicon_tokens(phrases) & lexicon
+
+
+def known_word_ids(progress):
+    """word_ids of a list, or of the progress entries reviewed up to KNOWN_LEVEL"""
+    if isinstance(progress, list):
+        return set(progress)
+    return {word_id for word_id, entry in progress.items()
+            if isinstance(entry, dict) and entry.get('reviewCount', 0) >= 1
+            and entry.get('level', 0) >= KNOWN_LEVEL}
+
+
+def known_tokens(path, vocabulary):
+    """Tokens of the words a learner knows, from a word_id list or progress object"""
+    known_ids = known_word_ids(load_json(path))
+    return lexicon_tokens(word['ticinese'] for word in vocabulary if word['word_id'] in known_ids)
+
+
+def estimated_level(a1_coverage):
+    for level, minimum in LEVEL_BANDS:
+        if a1_coverage >= minimum:
+            return level
+    return LEVEL_BANDS[-1][0]
+
+
+def coverage(counts, lexicon, tokens):
+    return sum(count for token, count in counts.items() if token in lexicon) / tokens
+
+
+def analyze(text, lexicon, core):
+    counts = Counter(token for token, _, _ in tokenize(text))
+    tokens = sum(counts.values())
+    if not tokens:
+        return None, counts
+    a1_coverage = coverage(counts, core, tokens)
+    metrics = {
+        'tokens': tokens,
+        'types': len(counts),
+        'type_token_ratio': round(len(counts) / tokens, 3),
+        'vocabulary_coverage': round(coverage(counts, lexicon, tokens), 3),
+        'a1_coverage': round(a1_coverage, 3),
+        'oov_rate': round(sum(1 for token in counts if token not in lexicon) / len(counts), 3),
+        'estimated_level': estimated_level(a1_coverage),
+    }
+    return metrics, counts
+
+
+def document_texts(stories, recipes):
+    """Yield (kind, id, declared level, text)"""
+    for story in stories:
+        yield 'story', story['story_id'], story.get('level', ''), story['text']
+    for recipe in recipes:
+        steps = [step.get('ticinese', '') for step in recipe.get('instructions', [])]
+        yield 'recipe', recipe['recipe_id'], recipe.get('difficulty_level', ''), '\n'.join(steps)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-dir', default=DATABASE_DIR)
+    parser.add_argument('--known', help="JSON file with the learner's known word_ids")
+    parser.add_argument('--dry-run', action='store_true', help="report only, do not write back")
+    args = parser.parse_args(argv)
+
+    vocabulary = load_database('vocabulary_expanded.json', 'vocabulary', args.database_dir)
+    stories = load_database('stories.json', 'stories', args.database_dir)
+    recipes = load_database('recipes.json', 'recipes', args.database_dir)
+    lexicon = vocabulary_tokens(vocabulary)
+    known = known_tokens(args.known, vocabulary) if args.known else None
+
+    results = {'story': {}, 'recipe': {}}
+    for kind, doc_id, declared, text in document_texts(stories, recipes):
+        core = core_lexicon(stories, recipes, vocabulary, lexicon, skip=(kind, doc_id))
+        metrics, counts = analyze(text, lexicon, core)
+        if metrics is None:
+            continue
+        results[kind][doc_id] = metrics
+        line = (f"{doc_id:<16} {declared:<6} -> {metrics['estimated_level']:<3} "
+                f"tokens {metrics['tokens']:>4}  TTR {metrics['type_token_ratio']:.2f}  "
+                f"vocab {metrics['vocabulary_coverage']:.0%}  A1 {metrics['a1_coverage']:.0%}  "
+                f"OOV {metrics['oov_rate']:.0%}")
+        if known is not None:
+            line += f"  known {coverage(counts, known, metrics['tokens']):.0%}"
+        print(line)
+
+    if not args.dry_run:
+        write_record_field(database_path('stories.json', args.database_dir),
+                           'story_id', 'metrics', results['story'])
+        write_record_field(database_path('recipes.json', args.database_dir),
+                           'recipe_id', 'metrics', results['recipe'])
+        print(f"Wrote metrics for {len(results['story'])} stories and {len(results['recipe'])} recipes")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Build the interlinear annotation artifact for the stories.
+
+Every story text in stories.json is tokenized once and matched against the
+whole vocabulary (plus the story's own vocabulary_focus list) in a single
+leftmost-longest pass. The result is a ready-to-render segment stream:
+
+    database/generated/story_annotations.json
+    {
+      "stories": {
+        "STORY_001": {
+          "segments": ["Maria la gh'ha on ", ["can", 0], ". ", ...],
+          "glosses": [{"word_id": "TICIN_0123", "ticinese": "can",
+                       "english": "dog", "focus": true}, ...]
+        }
+      }
+    }
+
+Plain strings are rendered as text; [text, n] pairs are words linked to
+glosses[n]. Focus words that are missing from the vocabulary keep a null
+word_id so they stay interactive.
+"""
+
+import argparse
+import os
+import sys
+
+from corpus import (DATABASE_DIR, GENERATED_DIR, LexiconMatcher,
+                    load_database, vocabulary_matcher, write_json)
+
+OUTPUT_FILENAME = 'story_annotations.json'
+
+
+def annotate_story(story, lexicon):
+    """Segment one story's text into plain runs and linked words"""
+    focus_matcher = LexiconMatcher()
+    focus_keys = set()
+    for focus in story.get('vocabulary_focus', []):
+        known = lexicon.lookup(focus['ticinese'])
+        focus_matcher.add(focus['ticinese'], {
+            'word_id': known['word_id'] if known else None,
+            'ticinese': focus['ticinese'],
+            'english': focus['english'],
+        })
+        focus_keys.add(focus['ticinese'])
+    # Story-specific glosses take precedence; the lexicon fills in the rest
+    matcher = focus_matcher.overlay(lexicon)
+
+    text = story['text']
+    segments = []
+    glosses = []
+    gloss_index = {}
+    cursor = 0
+    for start, end, gloss in matcher.scan(text):
+        if start > cursor:
+            segments.append(text[cursor:start])
+        key = (gloss['word_id'], gloss['ticinese'])
+        if key not in gloss_index:
+            gloss_index[key] = len(glosses)
+            glosses.append({
+                'word_id': gloss['word_id'],
+                'ticinese': gloss['ticinese'],
+                'english': gloss['english'],
+                'focus': gloss['ticinese'] in focus_keys,
+            })
+        segments.append([text[start:end], gloss_index[key]])
+        cursor = end
+    if cursor < len(text):
+        segments.append(text[cursor:])
+
+    return {'segments': segments, 'glosses': glosses}
+
+
+def build_annotations(database_dir=DATABASE_DIR):
+    vocabulary = load_database('vocabulary_expanded.json', 'vocabulary', database_dir)
+    stories = load_database('stories.json', 'stories', database_dir)
+    lexicon = vocabulary_matcher(vocabulary)
+    return {
+        'stories': {story['story_id']: annotate_story(story, lexicon) for story in stories},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-dir', default=DATABASE_DIR)
+    parser.add_argument('--output', default=os.path.join(GENERATED_DIR, OUTPUT_FILENAME))
+    args = parser.parse_args(argv)
+
+    annotations = build_annotations(args.database_dir)
+    write_json(args.output, annotations)
+
+    linked = sum(
+        sum(1 for segment in story['segments'] if isinstance(segment, list))
+        for story in annotations['stories'].values()
+    )
+    print(f"Annotated {len(annotations['stories'])} stories ({linked} linked words) -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Benchmark the data pipeline, the frontend's hot paths and the launcher.
+
+Cases (all by default):
+
+    load       read + JSON parse time of every database/*.json file
+    search     vocabulary filter latency (MobileVocabularyManager, via node)
+    quiz       quiz generation time (AssessmentEngine, via node)
+    annotate   story annotation cost (tools/annotate_stories.py)
+    launcher   latency/throughput of N keep-alive clients fetching database/*.json
+
+Each case runs on the current corpus and on scaled corpora (--scales
+current,10000,100000 word vocabularies). Scaled corpora come from
+tools/generate_corpus.py with a fixed seed, so stories, scenarios and
+recipes grow with the vocabulary and repeated runs measure the same data.
+The JS cases run the classes extracted from index.html and are skipped
+when node is not installed.
+
+Results are written as JSON (--output, default stdout):
+
+    {"meta": {...}, "results": [{"corpus": "10000", "case": "search",
+      "name": "vocabulary filter", "value": 4.1, "unit": "ms", ...}, ...]}
+
+`value` is always a lower-is-better time. --compare BASELINE exits with
+status 1 when any value is more than --tolerance slower than the same
+result in a previous run.
+"""
+
+import argparse
+import functools
+import glob
+import http.client
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from threading import Thread
+
+from corpus import ROOT_DIR, load_database, vocabulary_matcher
+from annotate_stories import annotate_story
+from generate_corpus import BASE_COUNTS, generate, scaled_counts
+
+sys.path.insert(0, os.path.join(ROOT_DIR, 'TicineseEncyclopedia_Package'))
+import launch_encyclopedia  # noqa: E402
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_HTML = os.path.join(ROOT_DIR, 'index.html')
+JS_HARNESS = os.path.join(TOOLS_DIR, 'benchmark_harness.js')
+JS_CLASSES = ('SpacedRepetitionEngine', 'RingBuffer', 'AssessmentEngine', 'MobileVocabularyManager')
+JS_CONSTANTS = ('ASSESSMENT_HISTORY_LIMIT', 'TREND_WINDOW')  # used by the classes above
+
+CASES = ('load', 'search', 'quiz', 'annotate', 'launcher')
+DEFAULT_SCALES = 'current,10000,100000'
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(samples):
+    return {
+        'value': round(percentile(samples, 0.5), 3),
+        'unit': 'ms',
+        'p95': round(percentile(samples, 0.95), 3),
+        'p99': round(percentile(samples, 0.99), 3),
+        'runs': len(samples),
+    }
+
+
+def timed(fn, repeat):
+    """Milliseconds of repeat calls to fn"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def prepare_corpus(scale, workdir):
+    """Site directory (holding database/) for a scale: 'current' or a word count"""
+    if scale == 'current':
+        return ROOT_DIR
+    site_dir = os.path.join(workdir, f'site-{scale}')
+    words = int(scale)
+    counts = scaled_counts(words / BASE_COUNTS['words'], words=words)
+    generate(os.path.join(site_dir, 'database'), counts, seed=0)
+    return site_dir
+
+
+def bench_load(site_dir, args):
+    results = []
+    for path in sorted(glob.glob(os.path.join(site_dir, 'database', '*.json'))):
+        def load():
+            with open(path, 'rb') as f:
+                json.loads(f.read())
+        result = summarize(timed(load, args.repeat))
+        result.update(name=os.path.basename(path), size_bytes=os.path.getsize(path))
+        results.append(result)
+    return results
+
+
+def extract_classes(html, names, constants=()):
+    """Source of the named top-level constants and classes of index.html's script"""
+    sources = []
+    for name in constants:
+        match = re.search(r'^ *const %s = [^;]*;$' % name, html, re.M)
+        if not match:
+            raise ValueError(f"const {name} not found in index.html")
+        sources.append(match.group(0))
+    for name in names:
+        match = re.search(r'^( *)class %s \{.*?^\1\}$' % name, html, re.M | re.S)
+        if not match:
+            raise ValueError(f"class {name} not found in index.html")
+        sources.append(match.group(0))
+    return '\n'.join(sources)
+
+
+def run_js_harness(site_dir, args, cache={}):
+    """Search and quiz samples from node; None when node is unavailable"""
+    if site_dir in cache:
+        return cache[site_dir]
+    node = shutil.which('node')
+    if node is None:
+        cache[site_dir] = None
+        return None
+    with open(INDEX_HTML, encoding='utf-8') as f:
+        classes = extract_classes(f.read(), JS_CLASSES, JS_CONSTANTS)
+    with tempfile.NamedTemporaryFile('w', suffix='.js', delete=False, encoding='utf-8') as f:
+        f.write(classes)
+    try:
+        output = subprocess.run(
+            [node, JS_HARNESS, f.name, os.path.join(site_dir, 'database', 'vocabulary_expanded.json'),
+             str(args.budget * 1000)],
+            check=True, capture_output=True, text=True).stdout
+    finally:
+        os.remove(f.name)
+    cache[site_dir] = json.loads(output)
+    return cache[site_dir]
+
+
+def bench_search(site_dir, args):
+    samples = run_js_harness(site_dir, args)
+    if samples is None:
+        return [{'name': 'vocabulary filter', 'skipped': 'node not found'}]
+    return [dict(summarize(samples['search']), name='vocabulary filter')]
+
+
+def bench_quiz(site_dir, args):
+    samples = run_js_harness(site_dir, args)
+    if samples is None:
+        return [{'name': 'generateVocabularyQuiz(10)', 'skipped': 'node not found'}]
+    result = summarize(samples['quiz'])
+    result.update(name='generateVocabularyQuiz(10)',
+                  quizzes_per_s=round(1000 / result['value'], 1) if result['value'] else None)
+    return [result]
+
+
+def bench_annotate(site_dir, args):
+    database_dir = os.path.join(site_dir, 'database')
+    vocabulary = load_database('vocabulary_expanded.json', 'vocabulary', database_dir)
+    stories = load_database('stories.json', 'stories', database_dir)
+
+    lexicon = None
+
+    def build():
+        nonlocal lexicon
+        lexicon = vocabulary_matcher(vocabulary)
+
+    build_samples = timed(build, args.repeat)
+
+    def annotate():
+        for story in stories:
+            annotate_story(story, lexicon)
+
+    annotate_result = summarize(timed(annotate, args.repeat))
+    characters = sum(len(story['text']) for story in stories)
+    annotate_result.update(
+        name=f'{len(stories)} stories',
+        characters_per_s=round(characters / (annotate_result['value'] / 1000)) if annotate_result['value'] else None)
+    return [dict(summarize(build_samples), name='lexicon build'), annotate_result]
+
+
+def bench_launcher(site_dir, args):
+    paths = [f"/database/{os.path.basename(path)}"
+             for path in sorted(glob.glob(os.path.join(site_dir, 'database', '*.json')))]
+    handler = functools.partial(launch_encyclopedia.QuietHTTPRequestHandler, directory=site_dir)
+    server = launch_encyclopedia.EncyclopediaServer(('127.0.0.1', 0), handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    latencies = []
+    transferred = []
+
+    def client(offset):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        own = []
+        size = 0
+        for i in range(args.requests):
+            start = time.perf_counter()
+            connection.request('GET', paths[(offset + i) % len(paths)])
+            response = connection.getresponse()
+            size += len(response.read())
+            own.append((time.perf_counter() - start) * 1000)
+        connection.close()
+        latencies.extend(own)
+        transferred.append(size)
+
+    start = time.perf_counter()
+    threads = [Thread(target=client, args=(n,)) for n in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    server.server_close()
+
+    result = summarize(latencies)
+    result.update(name=f'{args.clients} clients x {args.requests} requests',
+                  requests_per_s=round(len(latencies) / elapsed, 1),
+                  mb_per_s=round(sum(transferred) / elapsed / 1e6, 2))
+    return [result]
+
+
+BENCHMARKS = {
+    'load': bench_load,
+    'search': bench_search,
+    'quiz': bench_quiz,
+    'annotate': bench_annotate,
+    'launcher': bench_launcher,
+}
+
+
+def compare(results, baseline_path, tolerance):
+    """Lines describing results slower than the baseline by more than tolerance"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['corpus'], r['case'], r['name']): r for r in json.load(f)['results']}
+    regressions = []
+    for result in results:
+        before = baseline.get((result['corpus'], result['case'], result['name']))
+        if not before or 'value' not in result or not before.get('value'):
+            continue
+        ratio = result['value'] / before['value']
+        if ratio > 1 + tolerance:
+            regressions.append(f"{result['corpus']}/{result['case']}/{result['name']}: "
+                               f"{before['value']} -> {result['value']} {result['unit']} ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cases', default=','.join(CASES), help="comma-separated subset of " + ', '.join(CASES))
+    parser.add_argument('--scales', default=DEFAULT_SCALES, help="'current' and/or vocabulary sizes")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per Python-timed case")
+    parser.add_argument('--budget', type=float, default=2.0, help="seconds per JS-timed case")
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=50, help="requests per launcher client")
+    parser.add_argument('--output', help="write JSON results here instead of stdout")
+    parser.add_argument('--compare', metavar='BASELINE', help="earlier results to check against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    cases = [case.strip() for case in args.cases.split(',') if case.strip()]
+    unknown = set(cases) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(sorted(unknown))}")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='ticinese-bench-') as workdir:
+        for scale in args.scales.split(','):
+            site_dir = prepare_corpus(scale.strip(), workdir)
+            for case in cases:
+                for result in BENCHMARKS[case](site_dir, args):
+                    result = dict(corpus=scale.strip(), case=case, **result)
+                    results.append(result)
+                    summary = result.get('skipped') or f"{result['value']} {result['unit']} (p95 {result['p95']})"
+                    print(f"{result['corpus']:>8} {case:<9} {result['name']:<36} {summary}", file=sys.stderr)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for line in regressions:
+            print(f"regression: {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
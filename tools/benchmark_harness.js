@@ -0,0 +1,50 @@
+// Times the frontend's vocabulary filter and quiz generator outside the browser.
+// Called by benchmark.py, which extracts the classes from index.html:
+//
+//     node benchmark_harness.js <classes.js> <vocabulary.json> <budget_ms>
+//
+// Prints {"search": [ms, ...], "quiz": [ms, ...]} on stdout.
+
+const fs = require('fs');
+const vm = require('vm');
+
+const [classesPath, vocabularyPath, budgetArg] = process.argv.slice(2);
+const budgetMs = Number(budgetArg);
+
+global.localStorage = { getItem: () => null, setItem: () => {} };
+vm.runInThisContext(fs.readFileSync(classesPath, 'utf8') +
+    '\nglobalThis.benchmarkClasses = { MobileVocabularyManager, SpacedRepetitionEngine, AssessmentEngine };');
+const { MobileVocabularyManager, SpacedRepetitionEngine, AssessmentEngine } = benchmarkClasses;
+
+const vocabulary = JSON.parse(fs.readFileSync(vocabularyPath, 'utf8')).vocabulary;
+
+// Run fn at least minRuns times and until the time budget is spent
+function sample(fn, minRuns) {
+    const samples = [];
+    const start = performance.now();
+    while (samples.length < minRuns || (performance.now() - start < budgetMs && samples.length < 10000)) {
+        const t = performance.now();
+        fn(samples.length);
+        samples.push(performance.now() - t);
+    }
+    return samples;
+}
+
+// Deterministic search terms: three-letter prefixes of spread-out English glosses, plus a miss
+const terms = [];
+for (let i = 0; i < 50; i++) {
+    terms.push(vocabulary[(i * 7919) % vocabulary.length].english.toLowerCase().slice(0, 3));
+}
+terms.push('zzzz');
+
+const manager = new MobileVocabularyManager(vocabulary, 24);
+const search = sample(i => {
+    manager.searchTerm = terms[i % terms.length];
+    manager.getFilteredWords();
+}, terms.length);
+
+const spacedRepetition = new SpacedRepetitionEngine();
+const assessment = new AssessmentEngine();
+const quiz = sample(() => assessment.generateVocabularyQuiz(vocabulary, spacedRepetition, 10), 3);
+
+process.stdout.write(JSON.stringify({ search, quiz }));
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Rebuild every generated artifact, the grandma package and its zip.
+
+The build is a small dependency graph of stages. Each stage names the
+files it reads and writes (globs relative to the repository root) and
+the stages it needs; stages whose dependencies are done run at the same
+time, up to --jobs at once (tool stages are separate processes, so they
+use separate cores):
+
+    validate     validate_databases.py
+    annotate     story_annotations.json
+    concordance  concordance.json
+    scenarios    scenario_graphs.json (--prune-dangling)
+    shard        recipes/index.json, recipes/<recipe_id>.json
+    conjugate    verb_conjugations.json, inflected_forms.json
+    autocomplete autocomplete.json
+    chart        vocabulary_chart.svg
+    images       images/manifest.json, images/<name>-<hash>.<ext> variants
+                 (from vocabulary_chart.svg and database/images/)
+    facets       facets.json (from the vocabulary, pronoun, story, scenario
+                 and recipe databases)
+    package      index.html and database/ mirrored into TicineseEncyclopedia_Package/
+    compress     TicineseEncyclopedia_ForGrandma.zip
+
+A stage is skipped when the sha256 of its inputs (and of its own
+definition) matches the last successful run and its outputs are still
+the files that run wrote. Hashes are kept in .build_cache.json and
+reused while a file's size and mtime are unchanged, so a rebuild with
+nothing to do only stats files. A failed stage stops the stages that
+depend on it; the others still run.
+
+Tools that write back into the hand-edited sources (build_concordance.py
+--write-frequency, analyze_readability.py) are not stages: their output
+would be their own input. Run them by hand.
+"""
+
+import argparse
+import fnmatch
+import glob
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from corpus import ROOT_DIR
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_FILE = os.path.join(ROOT_DIR, '.build_cache.json')
+PACKAGE_DIR = 'TicineseEncyclopedia_Package'
+PACKAGE_ZIP = 'TicineseEncyclopedia_ForGrandma.zip'
+
+# Never shipped: backups, and what the launcher writes while it runs
+PACKAGE_EXCLUDE = ('*_backup.json', '__pycache__', '*.pyc', 'telemetry.json', '*.tmp')
+# 1980-01-01, the earliest zip timestamp, so the same files give the same zip
+ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+
+
+def tool(script, *args):
+    return [sys.executable, os.path.join(TOOLS_DIR, script), *args]
+
+
+def excluded(relpath, patterns):
+    return any(fnmatch.fnmatch(part, pattern) for part in relpath.split('/') for pattern in patterns)
+
+
+def package_files():
+    """(source, destination) relative paths mirrored into the package directory"""
+    pairs = [('index.html', f'{PACKAGE_DIR}/index.html')]
+    for path in sorted(glob.glob(os.path.join(ROOT_DIR, 'database', '**', '*'), recursive=True)):
+        relpath = os.path.relpath(path, ROOT_DIR).replace(os.sep, '/')
+        if os.path.isfile(path) and not excluded(relpath, PACKAGE_EXCLUDE):
+            pairs.append((relpath, f'{PACKAGE_DIR}/{relpath}'))
+    return pairs
+
+
+def build_package():
+    """Mirror the site into the package directory; return a summary line"""
+    wanted = set()
+    copied = 0
+    for source, destination in package_files():
+        wanted.add(destination)
+        source_path = os.path.join(ROOT_DIR, source)
+        destination_path = os.path.join(ROOT_DIR, destination)
+        if os.path.exists(destination_path) and file_digest(source_path) == file_digest(destination_path):
+            continue
+        os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+        shutil.copyfile(source_path, destination_path)
+        copied += 1
+
+    removed = 0
+    database_dir = os.path.join(ROOT_DIR, PACKAGE_DIR, 'database')
+    for path in glob.glob(os.path.join(database_dir, '**', '*'), recursive=True):
+        relpath = os.path.relpath(path, ROOT_DIR).replace(os.sep, '/')
+        if os.path.isfile(path) and relpath not in wanted and not excluded(relpath, PACKAGE_EXCLUDE):
+            os.remove(path)
+            removed += 1
+    return f"copied {copied}, removed {removed} stale, {len(wanted)} files mirrored"
+
+
+def build_zip():
+    """Write the package zip with fixed timestamps and sorted entries"""
+    package_dir = os.path.join(ROOT_DIR, PACKAGE_DIR)
+    paths = []
+    for path in glob.glob(os.path.join(package_dir, '**', '*'), recursive=True):
+        relpath = os.path.relpath(path, package_dir).replace(os.sep, '/')
+        if os.path.isfile(path) and not excluded(relpath, PACKAGE_EXCLUDE):
+            paths.append(relpath)
+
+    target = os.path.join(ROOT_DIR, PACKAGE_ZIP)
+    with zipfile.ZipFile(target + '.tmp', 'w') as archive:
+        for relpath in sorted(paths):
+            info = zipfile.ZipInfo(relpath, ZIP_DATE)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            with open(os.path.join(package_dir, relpath), 'rb') as f:
+                archive.writestr(info, f.read())
+    os.replace(target + '.tmp', target)
+    return f"{len(paths)} files, {os.path.getsize(target) / 1024:.0f} KB"
+
+
+class Stage:
+    """One build step: a tool command or an in-process function"""
+
+    def __init__(self, name, inputs, outputs, run, deps=(), exclude=()):
+        self.name = name
+        self.inputs = inputs
+        self.outputs = outputs
+        self.run = run
+        self.deps = deps
+        self.exclude = exclude
+
+    def definition(self):
+        """What changes the stage's result besides its input files"""
+        run = self.run[2:] if isinstance(self.run, list) else self.run.__name__
+        return json.dumps([self.name, run, self.inputs, self.outputs, self.exclude])
+
+
+GENERATED = 'database/generated'
+SHARED = ['tools/corpus.py']
+
+STAGES = [
+    Stage('validate',
+          ['database/*.json', 'tools/validate_databases.py'] + SHARED, [],
+          tool('validate_databases.py', '--summary')),
+    Stage('annotate',
+          ['database/stories.json', 'database/vocabulary_expanded.json', 'tools/annotate_stories.py'] + SHARED,
+          [f'{GENERATED}/story_annotations.json'],
+          tool('annotate_stories.py')),
+    Stage('concordance',
+          ['database/stories.json', 'database/recipes.json', 'database/scenarios.json',
+           'database/vocabulary_expanded.json', 'research_data/*', 'tools/build_concordance.py'] + SHARED,
+          [f'{GENERATED}/concordance.json'],
+          tool('build_concordance.py')),
+    Stage('scenarios',
+          ['database/scenarios.json', 'tools/compile_scenarios.py'] + SHARED,
+          [f'{GENERATED}/scenario_graphs.json'],
+          tool('compile_scenarios.py', '--prune-dangling')),
+    Stage('shard',
+          ['database/recipes.json', 'tools/shard_recipes.py'] + SHARED,
+          [f'{GENERATED}/recipes/*.json'],
+          tool('shard_recipes.py')),
+    Stage('conjugate',
+          ['database/vocabulary_expanded.json', 'database/grammar_rules.json', 'tools/conjugate_verbs.py'] + SHARED,
+          [f'{GENERATED}/verb_conjugations.json', f'{GENERATED}/inflected_forms.json'],
+          tool('conjugate_verbs.py')),
+    Stage('autocomplete',
+          ['database/vocabulary_expanded.json', 'tools/build_autocomplete.py', 'tools/build_concordance.py'] + SHARED,
+          [f'{GENERATED}/autocomplete.json'],
+          tool('build_autocomplete.py')),
+    Stage('chart',
+          ['database/vocabulary_expanded.json', 'tools/chart_vocabulary.py'] + SHARED,
+          [f'{GENERATED}/vocabulary_chart.svg'],
+          tool('chart_vocabulary.py')),
+    Stage('images',
+          [f'{GENERATED}/vocabulary_chart.svg', 'database/images/*', 'tools/build_images.py'] + SHARED,
+          [f'{GENERATED}/images/*'],
+          tool('build_images.py'),
+          deps=('chart',)),
+    Stage('facets',
+          ['database/vocabulary_expanded.json', 'database/pronouns.json', 'database/stories.json',
+           'database/scenarios.json', 'database/recipes.json', 'tools/build_facets.py'] + SHARED,
+          [f'{GENERATED}/facets.json'],
+          tool('build_facets.py')),
+    Stage('package',
+          ['index.html', 'database/**/*', 'tools/build.py'],
+          [f'{PACKAGE_DIR}/index.html', f'{PACKAGE_DIR}/database/**/*'],
+          build_package,
+          deps=('validate', 'annotate', 'concordance', 'scenarios', 'shard', 'conjugate', 'autocomplete', 'chart', 'images', 'facets'),
+          exclude=PACKAGE_EXCLUDE),
+    Stage('compress',
+          [f'{PACKAGE_DIR}/**/*', 'tools/build.py'],
+          [PACKAGE_ZIP],
+          build_zip,
+          deps=('package',),
+          exclude=PACKAGE_EXCLUDE),
+]
+
+
+_hash_lock = threading.Lock()
+_hashes = {}
+
+
+def file_digest(path):
+    """sha256 of a file, reused while its size and mtime are unchanged"""
+    stat = os.stat(path)
+    relpath = os.path.relpath(path, ROOT_DIR).replace(os.sep, '/')
+    with _hash_lock:
+        known = _hashes.get(relpath)
+    if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+        return known[2]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    with _hash_lock:
+        _hashes[relpath] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+    return digest.hexdigest()
+
+
+def expand(patterns, exclude=()):
+    """Sorted relative paths of the files matching any of the globs"""
+    paths = set()
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(ROOT_DIR, pattern), recursive=True):
+            relpath = os.path.relpath(path, ROOT_DIR).replace(os.sep, '/')
+            if os.path.isfile(path) and not excluded(relpath, exclude):
+                paths.add(relpath)
+    return sorted(paths)
+
+
+def fingerprint(paths):
+    return {path: file_digest(os.path.join(ROOT_DIR, path)) for path in paths}
+
+
+def input_key(stage):
+    digest = hashlib.sha256(stage.definition().encode())
+    for path, file_hash in fingerprint(expand(stage.inputs, stage.exclude)).items():
+        digest.update(f'{path}\0{file_hash}\n'.encode())
+    return digest.hexdigest()
+
+
+def up_to_date(stage, key, record):
+    if not record or record['inputs'] != key:
+        return False
+    return fingerprint(expand(stage.outputs, stage.exclude)) == record['outputs']
+
+
+def run_stage(stage, force, record):
+    """Run one stage unless its cache record still holds; returns (status, detail, record)"""
+    key = input_key(stage)
+    if not force and up_to_date(stage, key, record):
+        return 'cached', '', record
+    start = time.perf_counter()
+    if callable(stage.run):
+        detail = stage.run()
+    else:
+        result = subprocess.run(stage.run, cwd=ROOT_DIR, capture_output=True, text=True)
+        detail = (result.stdout + result.stderr).strip()
+        if result.returncode != 0:
+            return 'failed', detail, None
+    detail = f"{time.perf_counter() - start:.2f}s  {detail}"
+    return 'ran', detail, {'inputs': key, 'outputs': fingerprint(expand(stage.outputs, stage.exclude))}
+
+
+def select(stages, targets):
+    """The targets and everything they depend on, in definition order"""
+    by_name = {stage.name: stage for stage in stages}
+    wanted = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in wanted:
+            wanted.add(name)
+            pending.extend(by_name[name].deps)
+    return [stage for stage in stages if stage.name in wanted]
+
+
+def load_cache():
+    try:
+        with open(CACHE_FILE, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {'files': {}, 'stages': {}}
+    return {'files': cache.get('files', {}), 'stages': cache.get('stages', {})}
+
+
+def save_cache(cache):
+    with _hash_lock:
+        cache['files'] = dict(sorted(_hashes.items()))
+    with open(CACHE_FILE + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(CACHE_FILE + '.tmp', CACHE_FILE)
+
+
+def build(stages, jobs, force=False, verbose=False):
+    """Run the stages in dependency order, independent ones concurrently
+
+    Returns {stage name: status}, status being ran, cached, failed or
+    skipped (a dependency failed).
+    """
+    cache = load_cache()
+    _hashes.update(cache['files'])
+    names = {stage.name for stage in stages}
+    status = {}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while len(status) < len(stages):
+            for stage in stages:
+                if stage.name in status or stage.name in running.values():
+                    continue
+                deps = [dep for dep in stage.deps if dep in names]
+                if any(status.get(dep) in ('failed', 'skipped') for dep in deps):
+                    status[stage.name] = 'skipped'
+                    print(f"[skipped] {stage.name} (needs {', '.join(deps)})")
+                elif all(dep in status for dep in deps):
+                    future = pool.submit(run_stage, stage, force, cache['stages'].get(stage.name))
+                    running[future] = stage.name
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    result, detail, record = future.result()
+                except Exception as error:
+                    result, detail, record = 'failed', f"{type(error).__name__}: {error}", None
+                status[name] = result
+                if record:
+                    cache['stages'][name] = record
+                else:
+                    cache['stages'].pop(name, None)
+                if detail and not verbose and result == 'ran':
+                    detail = detail.splitlines()[0]
+                print(f"[{result}] {name}" + (f"  {detail}" if detail else ''))
+
+    save_cache(cache)
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('targets', nargs='*', help="stages to build with their dependencies (default: all)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="stages run at the same time")
+    parser.add_argument('--force', action='store_true', help="run stages even when their inputs are unchanged")
+    parser.add_argument('--list', action='store_true', help="list the stages and their dependencies")
+    parser.add_argument('--verbose', '-v', action='store_true', help="show the full output of every stage")
+    args = parser.parse_args(argv)
+
+    by_name = {stage.name: stage for stage in STAGES}
+    unknown = set(args.targets) - set(by_name)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+
+    if args.list:
+        for stage in STAGES:
+            print(f"{stage.name:<12} <- {', '.join(stage.deps) or '-'}")
+        return 0
+
+    start = time.perf_counter()
+    status = build(select(STAGES, args.targets or list(by_name)), max(1, args.jobs or 1),
+                   force=args.force, verbose=args.verbose)
+    counts = {result: list(status.values()).count(result) for result in ('ran', 'cached', 'failed', 'skipped')}
+    print(f"Built in {time.perf_counter() - start:.2f}s: "
+          + ', '.join(f"{count} {result}" for result, count in counts.items() if count))
+    return 1 if counts['failed'] or counts['skipped'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Build the search box's completion index over Ticinese, English and Italian.
+
+Every vocabulary entry contributes its Ticinese spelling, each English
+gloss ("eat, eats" gives "eat" and "eats"; "to eat" is keyed under "eat")
+and its Italian equivalent unless that merely repeats the English. Terms
+are ranked once, by frequency band, then measured corpus_frequency, then
+length. Output:
+
+    database/generated/autocomplete.json
+    {
+      "k": 8,
+      "languages": ["ticinese", "english", "italian"],
+      "words": [["TICIN_0001", "mi"], ...],       # vocabulary order
+      "terms": [["eat", 1, 9, 42, "to eat"], ...], # [key, language, word, rank(, text)]
+      "top": {"e": [17, 3, ...], ...}              # best k term indices per busy prefix
+    }
+
+`terms` is sorted by key (folded: lowercase, no accents), so a prefix is
+found by binary search; `text` is only stored when it differs from the
+key. Every prefix shared by more than SCAN_LIMIT terms has its top k
+precomputed, so a completion either reads one list or ranks at most
+SCAN_LIMIT terms.
+"""
+
+import argparse
+import os
+import re
+import sys
+from collections import defaultdict
+
+from build_concordance import FREQUENCY_BANDS
+from corpus import DATABASE_DIR, GENERATED_DIR, fold, load_database, write_json
+
+OUTPUT_FILENAME = 'autocomplete.json'
+
+LANGUAGES = ('ticinese', 'english', 'italian')
+TOP_K = 8
+SCAN_LIMIT = 32
+BAND_ORDER = {band: order for order, (band, _) in enumerate(FREQUENCY_BANDS)}
+
+GLOSS_SPLIT_RE = re.compile(r'[,;/]')
+
+
+def entry_terms(entry):
+    """(language index, key, text) of one vocabulary entry"""
+    ticinese = entry.get('ticinese', '').strip()
+    if ticinese:
+        yield 0, fold(ticinese), ticinese
+    english = entry.get('english', '').strip()
+    for gloss in GLOSS_SPLIT_RE.split(english):
+        gloss = gloss.strip()
+        key = fold(gloss[3:] if gloss.lower().startswith('to ') else gloss)
+        if key:
+            yield 1, key, gloss
+    italian = entry.get('italian_standard', '').strip()
+    if italian and fold(italian) != fold(english):
+        yield 2, fold(italian), italian
+
+
+def build_index(vocabulary, k=TOP_K, scan_limit=SCAN_LIMIT):
+    terms = []
+    seen = set()
+    for word, entry in enumerate(vocabulary):
+        popularity = (BAND_ORDER.get(entry.get('frequency'), len(BAND_ORDER)),
+                      -(entry.get('corpus_frequency') or 0))
+        for language, key, text in entry_terms(entry):
+            if (word, language, key) not in seen:
+                seen.add((word, language, key))
+                terms.append((popularity + (len(key), key, language), key, language, word, text))
+
+    terms.sort(key=lambda term: term[0])
+    terms = [(key, language, word, rank, text) for rank, (_, key, language, word, text) in enumerate(terms)]
+    terms.sort(key=lambda term: (term[0], term[3]))
+
+    by_prefix = defaultdict(list)
+    for index, term in enumerate(terms):
+        for length in range(1, len(term[0]) + 1):
+            by_prefix[term[0][:length]].append(index)
+    top = {prefix: sorted(indices, key=lambda index: terms[index][3])[:k]
+           for prefix, indices in sorted(by_prefix.items()) if len(indices) > scan_limit}
+
+    rows = [[key, language, word, rank] + ([text] if text != key else [])
+            for key, language, word, rank, text in terms]
+    return {
+        'k': k,
+        'languages': list(LANGUAGES),
+        'words': [[entry.get('word_id'), entry.get('ticinese', '')] for entry in vocabulary],
+        'terms': rows,
+        'top': top,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-dir', default=DATABASE_DIR)
+    parser.add_argument('--output', default=os.path.join(GENERATED_DIR, OUTPUT_FILENAME))
+    args = parser.parse_args(argv)
+
+    vocabulary = load_database('vocabulary_expanded.json', 'vocabulary', args.database_dir)
+    index = build_index(vocabulary)
+    write_json(args.output, index)
+    print(f"Indexed {len(index['terms'])} terms of {len(vocabulary)} words "
+          f"({len(index['top'])} precomputed prefixes, {os.path.getsize(args.output) / 1024:.0f} KB) -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Build the corpus-wide concordance and measured word frequencies.
+
+Every vocabulary word is located in the learner-facing texts (story text,
+recipe instructions and family stories, scenario dialogue nodes and their
+response choices) and in the research notes under research_data/. Output:
+
+    database/generated/concordance.json
+    {
+      "documents": [["story", "STORY_001", "text", "El Can de Maria"], ...],
+      "postings": {"TICIN_0003": [[0, 19, 22], ...]},   # [document, start, end]
+      "frequency": {"TICIN_0003": {"story": 12, "recipe": 0,
+                                   "scenario": 1, "research": 0}},
+      "forms": {"can": ["TICIN_0003"], ...}
+    }
+
+Offsets are character positions in the document's field. With
+--write-frequency the measured counts are also written back to
+vocabulary_expanded.json: `corpus_frequency` holds the learner-facing count
+and `frequency` is re-banded from it (research notes are mostly English
+prose, so they get postings but do not drive the band; `archaic` labels
+are historical, not statistical, and are kept). Words that never occur in
+the learner-facing texts keep their hand-set band: a corpus of a few
+stories says nothing about how rare they are. Write-back counts per
+entry, so entries that share a word_id do not inherit each other's counts.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+from corpus import (DATABASE_DIR, GENERATED_DIR, ROOT_DIR, database_path,
+                    load_database, load_json, normalize, vocabulary_matcher,
+                    write_json)
+
+OUTPUT_FILENAME = 'concordance.json'
+RESEARCH_DIR = os.path.join(ROOT_DIR, 'research_data')
+LEARNER_KINDS = ('story', 'recipe', 'scenario')
+SOURCE_KINDS = LEARNER_KINDS + ('research',)
+
+# Minimum learner-facing occurrences for each band, most frequent first
+FREQUENCY_BANDS = (('common', 10), ('uncommon', 3), ('rare', 1))
+
+
+def iter_documents(database_dir=DATABASE_DIR, research_dir=RESEARCH_DIR):
+    """Yield (kind, id, field, title, text) for every text in the corpus"""
+    for story in load_database('stories.json', 'stories', database_dir):
+        yield 'story', story['story_id'], 'text', story['title'], story['text']
+
+    for recipe in load_database('recipes.json', 'recipes', database_dir):
+        title = recipe['ticinese_name']
+        for i, step in enumerate(recipe.get('instructions', [])):
+            yield 'recipe', recipe['recipe_id'], f'instructions[{i}]', title, step.get('ticinese', '')
+        yield 'recipe', recipe['recipe_id'], 'family_story', title, recipe.get('family_story', '')
+
+    for scenario in load_database('scenarios.json', 'scenarios', database_dir):
+        title = scenario['title']
+        for node_id, node in scenario.get('dialogue_tree', {}).items():
+            field = f'dialogue_tree.{node_id}'
+            yield 'scenario', scenario['scenario_id'], field, title, node.get('text', '')
+            for i, response in enumerate(node.get('responses', [])):
+                yield ('scenario', scenario['scenario_id'], f'{field}.responses[{i}]',
+                       title, response.get('choice', ''))
+
+    for path in sorted(glob.glob(os.path.join(research_dir, '*.txt'))):
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        name = os.path.basename(path)
+        yield 'research', name, 'text', text.split('\n', 1)[0][:120], text
+
+
+def build_concordance(vocabulary, documents):
+    """Posting lists, per-source counts and spelling lookup for the vocabulary
+
+    Also returns the learner-facing count of every vocabulary entry, in
+    vocabulary order, for writing back.
+    """
+    matcher = vocabulary_matcher(vocabulary)
+    entry_of = {id(word): i for i, word in enumerate(vocabulary)}
+    entry_counts = [0] * len(vocabulary)
+    doc_table = []
+    postings = {}
+    frequency = {}
+
+    for kind, doc_id, field, title, text in documents:
+        if not text:
+            continue
+        doc_index = len(doc_table)
+        doc_table.append([kind, doc_id, field, title])
+        for start, end, word in matcher.scan(text):
+            word_id = word['word_id']
+            postings.setdefault(word_id, []).append([doc_index, start, end])
+            counts = frequency.setdefault(word_id, dict.fromkeys(SOURCE_KINDS, 0))
+            counts[kind] += 1
+            if kind in LEARNER_KINDS:
+                entry_counts[entry_of[id(word)]] += 1
+
+    forms = {}
+    for word in vocabulary:
+        forms.setdefault(normalize(word['ticinese']), []).append(word['word_id'])
+
+    concordance = {
+        'documents': doc_table,
+        'postings': postings,
+        'frequency': frequency,
+        'forms': forms,
+    }
+    return concordance, entry_counts
+
+
+def frequency_band(count):
+    for band, minimum in FREQUENCY_BANDS:
+        if count >= minimum:
+            return band
+    return FREQUENCY_BANDS[-1][0]
+
+
+def write_frequencies(database_dir, entry_counts):
+    """Store measured counts, and bands of the words that occur, in vocabulary_expanded.json"""
+    path = database_path('vocabulary_expanded.json', database_dir)
+    data = load_json(path)
+    for word, count in zip(data['vocabulary'], entry_counts):
+        word['corpus_frequency'] = count
+        if count and word.get('frequency') != 'archaic':
+            word['frequency'] = frequency_band(count)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-dir', default=DATABASE_DIR)
+    parser.add_argument('--research-dir', default=RESEARCH_DIR)
+    parser.add_argument('--output', default=os.path.join(GENERATED_DIR, OUTPUT_FILENAME))
+    parser.add_argument('--write-frequency', action='store_true',
+                        help="write measured counts back to vocabulary_expanded.json")
+    args = parser.parse_args(argv)
+
+    vocabulary = load_database('vocabulary_expanded.json', 'vocabulary', args.database_dir)
+    concordance, entry_counts = build_concordance(
+        vocabulary, iter_documents(args.database_dir, args.research_dir))
+    write_json(args.output, concordance)
+    if args.write_frequency:
+        write_frequencies(args.database_dir, entry_counts)
+
+    occurrences = sum(len(p) for p in concordance['postings'].values())
+    print(f"Indexed {len(concordance['documents'])} documents: {occurrences} occurrences "
+          f"of {len(concordance['postings'])}/{len(vocabulary)} words -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Count the records behind every filter value, so filter chips can show them.
+
+For each collection the page filters, the number of records per value of
+its facet fields, plus cross tables for pairs the page combines
+(vocabulary category x frequency, story category x level). Output:
+
+    database/generated/facets.json
+    {
+      "vocabulary": {
+        "total": 1284,
+        "facets": {"category": {"pronouns": 545, ...}, "frequency": {...}, ...},
+        "cross": {"category": {"frequency": {"pronouns": {"common": 511, ...}, ...}}}
+      },
+      "pronouns": {...}, "stories": {...}, "scenarios": {...}, "recipes": {...}
+    }
+
+Values are listed most frequent first; records without the field count
+under "none". The page adds a chip's count without scanning the records,
+and greys out chips with nothing behind them.
+"""
+
+import argparse
+import os
+import sys
+from collections import Counter, defaultdict
+
+from corpus import DATABASE_DIR, GENERATED_DIR, load_database, write_json
+
+OUTPUT_FILENAME = 'facets.json'
+MISSING = 'none'
+
+# collection -> (file, table, facet fields, cross-tabulated field pairs)
+COLLECTIONS = {
+    'vocabulary': ('vocabulary_expanded.json', 'vocabulary',
+                   ('category', 'frequency', 'part_of_speech'), (('category', 'frequency'),)),
+    'pronouns': ('pronouns.json', 'pronouns', ('type', 'person', 'number'), ()),
+    'stories': ('stories.json', 'stories', ('category', 'level'), (('category', 'level'),)),
+    'scenarios': ('scenarios.json', 'scenarios', ('category', 'difficulty_level'), ()),
+    'recipes': ('recipes.json', 'recipes', ('category', 'difficulty_level'), ()),
+}
+
+
+def facet_value(record, field):
+    value = record.get(field)
+    return str(value) if value not in (None, '') else MISSING
+
+
+def ranked(counts):
+    return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+
+def count_facets(records, fields, pairs):
+    """Facet and cross counts of one collection, in a single pass"""
+    counts = {field: Counter() for field in fields}
+    cross = {pair: defaultdict(Counter) for pair in pairs}
+    total = 0
+    for record in records:
+        total += 1
+        values = {field: facet_value(record, field) for field in set(fields).union(*pairs)}
+        for field in fields:
+            counts[field][values[field]] += 1
+        for (row, column), table in cross.items():
+            table[values[row]][values[column]] += 1
+
+    result = {'total': total, 'facets': {field: ranked(counts[field]) for field in fields}}
+    if pairs:
+        result['cross'] = {}
+        for (row, column), table in cross.items():
+            rows = result['cross'].setdefault(row, {})
+            rows[column] = {value: ranked(table[value]) for value in ranked(counts[row])}
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-dir', default=DATABASE_DIR)
+    parser.add_argument('--output', default=os.path.join(GENERATED_DIR, OUTPUT_FILENAME))
+    args = parser.parse_args(argv)
+
+    tables = {}
+    for name, (filename, table, fields, pairs) in COLLECTIONS.items():
+        tables[name] = count_facets(load_database(filename, table, args.database_dir), fields, pairs)
+
+    write_json(args.output, tables)
+    summary = ', '.join(f"{facets['total']} {name}" for name, facets in tables.items())
+    print(f"Counted facets of {summary} -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
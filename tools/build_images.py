@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Produce size-appropriate, content-hashed image variants and their srcset.
+
+Sources are the generated vocabulary chart and every photo or scan put in
+database/images/ (history_culture.json entries show one with
+"image": "<file name without extension>"). Output:
+
+    database/generated/images/<id>-<hash>.svg            minified vector
+    database/generated/images/<id>-<width>-<hash>.webp   per width in WIDTHS
+    database/generated/images/<id>-<width>-<hash>.png    fallback per width
+    database/generated/images/manifest.json
+    {"images": {"vocabulary-chart": {
+        "alt": "...", "width": 656, "height": 680,
+        "src": "database/generated/images/vocabulary-chart-1a2b3c4d5e.svg",
+        "sources": [{"type": "image/webp", "srcset": "...-480-....webp 480w, ..."}]
+    }}}
+
+The hash in each name is taken from the file's bytes, so the files can be
+cached forever and a changed image gets a new URL. Widths larger than the
+source are not produced. Raster variants need Pillow; without it the
+source is copied once under a hashed name (no srcset) and a warning is
+printed. Files no longer listed in the manifest are removed.
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import re
+import sys
+from io import BytesIO
+
+from corpus import DATABASE_DIR, GENERATED_DIR, ROOT_DIR, write_json
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; raster sources are copied instead
+    Image = None
+
+OUTPUT_DIRNAME = 'images'
+MANIFEST_FILENAME = 'manifest.json'
+
+WIDTHS = (480, 960, 1600)
+WEBP_QUALITY = 80
+RASTER_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+
+# Generated images and their alt text; database/images/ adds the photos
+IMAGES = (
+    ('vocabulary-chart', os.path.join(GENERATED_DIR, 'vocabulary_chart.svg'),
+     'Ticinese vocabulary by category'),
+)
+
+SVG_SIZE_RE = re.compile(r'<svg\b[^>]*?\bwidth="(\d+(?:\.\d+)?)"[^>]*?\bheight="(\d+(?:\.\d+)?)"')
+
+
+def hashed_name(stem, data, extension):
+    return f"{stem}-{hashlib.sha256(data).hexdigest()[:10]}{extension}"
+
+
+def minify_svg(text):
+    """Drop comments, the XML prolog and whitespace between tags"""
+    text = re.sub(r'<!--.*?-->', '', text, flags=re.S)
+    text = re.sub(r'<\?xml[^>]*\?>', '', text)
+    text = re.sub(r'>\s+<', '><', text)
+    return re.sub(r'\s{2,}', ' ', text).strip().encode('utf-8')
+
+
+class Writer:
+    """Writes variants into the output directory and remembers what it wrote"""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.written = set()
+
+    def write(self, name, data):
+        path = os.path.join(self.output_dir, name)
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(data)
+        self.written.add(name)
+        return os.path.relpath(path, ROOT_DIR).replace(os.sep, '/')
+
+
+def vector_entry(image_id, path, alt, writer):
+    with open(path, encoding='utf-8') as f:
+        data = minify_svg(f.read())
+    size = SVG_SIZE_RE.search(data.decode('utf-8'))
+    entry = {'alt': alt, 'src': writer.write(hashed_name(image_id, data, '.svg'), data)}
+    if size:
+        entry['width'], entry['height'] = round(float(size.group(1))), round(float(size.group(2)))
+    return entry
+
+
+def encode(image, fmt):
+    buffer = BytesIO()
+    if fmt == 'WEBP':
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=6)
+    else:
+        image.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def raster_entry(image_id, path, alt, writer, widths=WIDTHS):
+    if Image is None:
+        with open(path, 'rb') as f:
+            data = f.read()
+        extension = os.path.splitext(path)[1].lower()
+        return {'alt': alt, 'src': writer.write(hashed_name(image_id, data, extension), data)}
+
+    with Image.open(path) as source:
+        source.load()
+        width, height = source.size
+        mode = 'RGBA' if 'A' in source.getbands() or 'transparency' in source.info else 'RGB'
+        source = source.convert(mode)
+        targets = [w for w in widths if w < width] + [width]
+        srcsets = {'WEBP': [], 'PNG': []}
+        for target in targets:
+            resized = source if target == width else source.resize(
+                (target, round(height * target / width)), Image.LANCZOS)
+            for fmt, extension in (('WEBP', '.webp'), ('PNG', '.png')):
+                data = encode(resized, fmt)
+                url = writer.write(hashed_name(f'{image_id}-{target}', data, extension), data)
+                srcsets[fmt].append(f'{url} {target}w')
+
+    return {
+        'alt': alt,
+        'width': width,
+        'height': height,
+        'src': srcsets['PNG'][0].split(' ')[0],
+        'srcset': ', '.join(srcsets['PNG']),
+        'sources': [{'type': 'image/webp', 'srcset': ', '.join(srcsets['WEBP'])}],
+    }
+
+
+def image_sources(database_dir):
+    """(id, path, alt) of every image to process"""
+    sources = list(IMAGES)
+    for path in sorted(glob.glob(os.path.join(database_dir, 'images', '*'))):
+        stem, extension = os.path.splitext(os.path.basename(path))
+        if extension.lower() in RASTER_EXTENSIONS:
+            sources.append((stem, path, stem.replace('_', ' ').replace('-', ' ')))
+    return sources
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-dir', default=DATABASE_DIR)
+    parser.add_argument('--output-dir', default=os.path.join(GENERATED_DIR, OUTPUT_DIRNAME))
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    writer = Writer(args.output_dir)
+    manifest = {}
+    copied = []
+    for image_id, path, alt in image_sources(args.database_dir):
+        if not os.path.exists(path):
+            print(f"warning: {path} not found, skipped", file=sys.stderr)
+            continue
+        if path.lower().endswith('.svg'):
+            manifest[image_id] = vector_entry(image_id, path, alt, writer)
+        else:
+            manifest[image_id] = raster_entry(image_id, path, alt, writer)
+            if Image is None:
+                copied.append(image_id)
+    if copied:
+        print(f"warning: Pillow is not installed; copied {', '.join(copied)} without resized variants",
+              file=sys.stderr)
+
+    write_json(os.path.join(args.output_dir, MANIFEST_FILENAME), {'images': manifest})
+    removed = 0
+    for path in glob.glob(os.path.join(args.output_dir, '*')):
+        name = os.path.basename(path)
+        if name != MANIFEST_FILENAME and name not in writer.written:
+            os.remove(path)
+            removed += 1
+
+    size = sum(os.path.getsize(os.path.join(args.output_dir, name)) for name in writer.written)
+    print(f"Wrote {len(writer.written)} files for {len(manifest)} images ({size / 1024:.0f} KB"
+          f"{f', removed {removed} stale' if removed else ''}) -> {args.output_dir}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Draw the vocabulary-by-category bar chart as a static SVG.
+
+Counts come from vocabulary_expanded.json, so the chart follows the data
+instead of the numbers typed into Vocab/Vocab/chart_script.py (which also
+needs plotly and pandas). Output:
+
+    database/generated/vocabulary_chart.svg
+
+One horizontal bar per category, largest first; categories beyond --top
+are summed into "other".
+"""
+
+import argparse
+import os
+import sys
+from collections import Counter
+from xml.sax.saxutils import escape
+
+from corpus import DATABASE_DIR, GENERATED_DIR, load_database
+
+OUTPUT_FILENAME = 'vocabulary_chart.svg'
+
+BAR_COLOR = '#1FB8CD'
+BAR_HEIGHT = 18
+BAR_GAP = 6
+LABEL_WIDTH = 170
+CHART_WIDTH = 420
+MARGIN = 16
+
+
+def category_counts(vocabulary, top):
+    counts = Counter(word.get('category') or 'uncategorized' for word in vocabulary)
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    if len(ranked) > top:
+        ranked = ranked[:top] + [('other', sum(count for _, count in ranked[top:]))]
+    return ranked
+
+
+def render_svg(counts, title):
+    largest = max((count for _, count in counts), default=1)
+    top = MARGIN + 24
+    height = top + len(counts) * (BAR_HEIGHT + BAR_GAP) + MARGIN
+    width = MARGIN + LABEL_WIDTH + CHART_WIDTH + 50
+    lines = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="sans-serif" font-size="12">',
+        f'<text x="{MARGIN}" y="{MARGIN + 8}" font-size="15" font-weight="bold">{escape(title)}</text>',
+    ]
+    for row, (category, count) in enumerate(counts):
+        y = top + row * (BAR_HEIGHT + BAR_GAP)
+        bar = max(1, round(count / largest * CHART_WIDTH))
+        x = MARGIN + LABEL_WIDTH
+        baseline = y + BAR_HEIGHT - 5
+        lines.append(f'<text x="{x - 8}" y="{baseline}" text-anchor="end">{escape(category.replace("_", " "))}</text>')
+        lines.append(f'<rect x="{x}" y="{y}" width="{bar}" height="{BAR_HEIGHT}" fill="{BAR_COLOR}"/>')
+        lines.append(f'<text x="{x + bar + 6}" y="{baseline}">{count}</text>')
+    lines.append('</svg>')
+    return '\n'.join(lines) + '\n'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-dir', default=DATABASE_DIR)
+    parser.add_argument('--output', default=os.path.join(GENERATED_DIR, OUTPUT_FILENAME))
+    parser.add_argument('--top', type=int, default=25, help="categories drawn before the rest become 'other'")
+    args = parser.parse_args(argv)
+
+    vocabulary = load_database('vocabulary_expanded.json', 'vocabulary', args.database_dir)
+    counts = category_counts(vocabulary, args.top)
+    svg = render_svg(counts, f'Ticinese vocabulary by category ({len(vocabulary)} words)')
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(svg)
+    print(f"Charted {len(vocabulary)} words in {len(counts)} categories -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
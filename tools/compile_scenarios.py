@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Compile the scenario dialogue trees into validated, integer-indexed graphs.
+
+Each dialogue_tree in scenarios.json is keyed by node name, with `next`
+links and speaker names as free text. The compiler resolves all of that
+once, at build time:
+
+    database/generated/scenario_graphs.json
+    {
+      "scenarios": {
+        "MARKET_001": {
+          "start": 0,
+          "vocabulary": ["costa", "franchi", ...],
+          "nodes": [{
+            "key": "opening", "speaker": 0, "text": "...", "translation": "...",
+            "vocabulary": [0, 1],            # indices into the vocabulary table
+            "responses": [{"choice": "...", "translation": "...", "next": 1}],
+            "reachable": [1, 2, 3],          # nodes reachable from here
+            "learnable": [0, 1, 2, 5],       # vocabulary learnable from here on
+            "remaining": 2                   # fewest steps to where the dialogue stops
+          }, ...]
+        }
+      }
+    }
+
+`speaker` is an index into the scenario's characters (authors write
+"Nonna Maria" for "Nonna Maria Lombardi"; the name must identify exactly
+one character). The build fails on dangling `next` links, unknown
+speakers, a missing opening node or nodes without a way to an ending.
+--prune-dangling drops choices that lead nowhere instead of failing, and
+lists them as warnings. Endings are the nodes authored without choices;
+a node left without choices by pruning is a dead end: it is reported as a
+warning and compiled as a terminal node marked "dead_end": true, so the
+page can stop there without counting it as a completed ending.
+"""
+
+import argparse
+import os
+import sys
+from collections import deque
+
+from corpus import DATABASE_DIR, GENERATED_DIR, load_database, write_json
+
+OUTPUT_FILENAME = 'scenario_graphs.json'
+START_NODE = 'opening'
+
+
+def resolve_speaker(speaker, characters):
+    """Index of the character a node's speaker refers to, or None"""
+    names = [character['name'] for character in characters]
+    if speaker in names:
+        return names.index(speaker)
+    tokens = speaker.split()
+    matches = [i for i, name in enumerate(names)
+               if all(token in name.split() for token in tokens)]
+    return matches[0] if len(matches) == 1 else None
+
+
+def reachable_from(start, edges):
+    """Nodes reachable from start (excluding start unless it is on a cycle)"""
+    seen = set()
+    stack = list(edges[start])
+    while stack:
+        node = stack.pop()
+        if node not in seen:
+            seen.add(node)
+            stack.extend(edges[node])
+    return seen
+
+
+def steps_to_ending(edges, endings):
+    """Fewest steps from every node to an ending (None if there is no way out)"""
+    incoming = [[] for _ in edges]
+    for source, targets in enumerate(edges):
+        for target in targets:
+            incoming[target].append(source)
+    remaining = [None] * len(edges)
+    queue = deque(endings)
+    for node in endings:
+        remaining[node] = 0
+    while queue:
+        node = queue.popleft()
+        for source in incoming[node]:
+            if remaining[source] is None:
+                remaining[source] = remaining[node] + 1
+                queue.append(source)
+    return remaining
+
+
+def compile_scenario(scenario, prune_dangling=False):
+    """Return (graph, errors, warnings) for one scenario"""
+    scenario_id = scenario['scenario_id']
+    tree = scenario.get('dialogue_tree', {})
+    characters = scenario.get('characters', [])
+    errors = []
+    warnings = []
+
+    if START_NODE not in tree:
+        errors.append(f"{scenario_id}: no '{START_NODE}' node")
+        return None, errors, warnings
+
+    # Opening first, then authoring order
+    keys = [START_NODE] + [key for key in tree if key != START_NODE]
+    position = {key: i for i, key in enumerate(keys)}
+    vocabulary = []
+    vocabulary_index = {}
+    nodes = []
+    terminals = []
+
+    for key in keys:
+        node = tree[key]
+        speaker = resolve_speaker(node.get('speaker', ''), characters)
+        if speaker is None:
+            errors.append(f"{scenario_id}.{key}: speaker {node.get('speaker')!r} "
+                          f"does not name exactly one character")
+
+        words = []
+        for word in node.get('vocabulary_learned', []):
+            if word not in vocabulary_index:
+                vocabulary_index[word] = len(vocabulary)
+                vocabulary.append(word)
+            if vocabulary_index[word] not in words:
+                words.append(vocabulary_index[word])
+
+        responses = []
+        authored_ending = not node.get('responses')
+        for response in node.get('responses', []):
+            target = response.get('next')
+            if target not in position:
+                message = f"{scenario_id}.{key}: choice leads to missing node {target!r}"
+                (warnings if prune_dangling else errors).append(message)
+                continue
+            responses.append({
+                'choice': response['choice'],
+                'translation': response.get('translation', ''),
+                'next': position[target],
+            })
+        dead_end = not authored_ending and not responses
+        if dead_end:
+            warnings.append(f"{scenario_id}.{key}: dead end, every choice leads to a missing node")
+
+        compiled = {
+            'key': key,
+            'speaker': speaker,
+            'text': node.get('text', ''),
+            'translation': node.get('translation', ''),
+            'vocabulary': words,
+            'responses': responses,
+        }
+        for field in ('cultural_note', 'completion_note'):
+            if node.get(field):
+                compiled[field] = node[field]
+        if dead_end:
+            compiled['dead_end'] = True
+        nodes.append(compiled)
+        if authored_ending or dead_end:
+            terminals.append(len(nodes) - 1)
+
+    edges = [[response['next'] for response in node['responses']] for node in nodes]
+    remaining = steps_to_ending(edges, terminals)
+    from_start = reachable_from(0, edges) | {0}
+
+    for i, node in enumerate(nodes):
+        reachable = reachable_from(i, edges)
+        learnable = set(node['vocabulary'])
+        for other in reachable:
+            learnable.update(nodes[other]['vocabulary'])
+        node['reachable'] = sorted(reachable)
+        node['learnable'] = sorted(learnable)
+        node['remaining'] = remaining[i]
+        if remaining[i] is None:
+            errors.append(f"{scenario_id}.{node['key']}: no path to an ending")
+        if i not in from_start:
+            warnings.append(f"{scenario_id}.{node['key']}: unreachable from '{START_NODE}'")
+
+    graph = {'start': 0, 'vocabulary': vocabulary, 'nodes': nodes}
+    return graph, errors, warnings
+
+
+def compile_scenarios(scenarios, prune_dangling=False):
+    graphs = {}
+    errors = []
+    warnings = []
+    for scenario in scenarios:
+        graph, scenario_errors, scenario_warnings = compile_scenario(scenario, prune_dangling)
+        errors.extend(scenario_errors)
+        warnings.extend(scenario_warnings)
+        if graph is not None:
+            graphs[scenario['scenario_id']] = graph
+    return {'scenarios': graphs}, errors, warnings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-dir', default=DATABASE_DIR)
+    parser.add_argument('--output', default=os.path.join(GENERATED_DIR, OUTPUT_FILENAME))
+    parser.add_argument('--prune-dangling', action='store_true',
+                        help="drop choices that lead to missing nodes instead of failing")
+    args = parser.parse_args(argv)
+
+    scenarios = load_database('scenarios.json', 'scenarios', args.database_dir)
+    compiled, errors, warnings = compile_scenarios(scenarios, args.prune_dangling)
+    for message in warnings:
+        print(f"warning: {message}", file=sys.stderr)
+    if errors:
+        for message in errors:
+            print(f"error: {message}", file=sys.stderr)
+        print(f"{len(errors)} error(s); nothing written", file=sys.stderr)
+        return 1
+
+    write_json(args.output, compiled)
+    node_count = sum(len(graph['nodes']) for graph in compiled['scenarios'].values())
+    print(f"Compiled {len(compiled['scenarios'])} scenarios ({node_count} nodes) -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Generate verb paradigms and the inflected-form index used by search.
+
+Every verb in vocabulary_expanded.json is assigned to one of the four
+conjugation classes of GRAM_004 by its infinitive ending (-à, -é, -er,
+-ì; the doubled -aa/-ee/-ii spellings count too). Entries filed as a
+third person form ("magna") are conjugated from an infinitive among
+their regional_variants, or as -à verbs when they end in -a. Present,
+imperfect (GRAM_007), future (GRAM_007), imperative, participles and
+gerund come from the class endings below; the verbs listed as irregular
+in GRAM_004's exceptions get no generated forms, since theirs are
+suppletive. Output:
+
+    database/generated/verb_conjugations.json     (the table of SCHEMA_DESIGN.md)
+    {"verb_conjugations": [{"verb_id": "TICIN_0670", "infinitive": "magnà",
+      "verb_type": "regular", "conjugation_class": "-à",
+      "present_tense": {"first_singular": "magni", ..., "first_plural": "magnòm", ...},
+      "past_tense": {...}, "future_tense": {...}, "imperative": {...},
+      "participle_past": "magnad", ...}, ...]}
+
+    database/generated/inflected_forms.json
+    {"forms": {"magni": ["TICIN_0010", "TICIN_0670"], "magnom": [...], ...}}
+
+Forms are stored without subject pronouns (GRAM_001 adds the clitics).
+Index keys are folded (lowercase, no accents), so a search term is
+resolved with one lookup: "magnòm" and "magnom" both find "magna".
+Word ids are shared by a few unrelated entries, so the index lists
+verb entries only and the page matches verbs by id.
+"""
+
+import argparse
+import os
+import re
+import sys
+from functools import lru_cache
+
+from corpus import DATABASE_DIR, GENERATED_DIR, fold, load_database, write_json
+
+CONJUGATIONS_FILENAME = 'verb_conjugations.json'
+FORMS_FILENAME = 'inflected_forms.json'
+
+PERSONS = ('first_singular', 'second_singular', 'third_singular',
+           'first_plural', 'second_plural', 'third_plural')
+IMPERATIVE_PERSONS = ('second_singular', 'first_plural', 'second_plural')
+
+# Endings by class; GRAM_004 gives the present singular and first plural,
+# GRAM_007 the imperfect and future, SCHEMA_DESIGN.md the -à plural
+# ("magnòm", "magnè", "magnen") and GRAM_008/GRAM_017 the participles.
+CLASSES = {
+    '-à': {
+        'present_tense': ('i', 'et', 'a', 'òm', 'è', 'en'),
+        'past_tense': ('avi', 'avet', 'ava', 'avom', 'avov', 'aven'),
+        'future_tense': ('aroo', 'aree', 'arà', 'arèmm', 'arii', 'arann'),
+        'imperative': ('a', 'òm', 'è'),
+        'participle_past': 'ad',
+        'participle_present': 'ant',
+        'gerund': 'and',
+    },
+    '-é': {
+        'present_tense': ('i', 'et', '', 'om', 'ii', 'en'),
+        'past_tense': ('évi', 'évet', 'éva', 'évom', 'évov', 'éven'),
+        'future_tense': ('aroo', 'aree', 'arà', 'arèmm', 'arii', 'arann'),
+        'imperative': ('', 'om', 'ii'),
+        'participle_past': 'ud',
+        'participle_present': 'ent',
+        'gerund': 'end',
+    },
+    '-ì': {
+        'present_tense': ('i', 'et', '', 'om', 'ii', 'en'),
+        'past_tense': ('ivi', 'ivet', 'iva', 'ivom', 'ivov', 'iven'),
+        'future_tense': ('iroo', 'iree', 'irà', 'irèmm', 'irii', 'irann'),
+        'imperative': ('', 'om', 'ii'),
+        'participle_past': 'ud',
+        'participle_present': 'ent',
+        'gerund': 'end',
+    },
+}
+CLASSES['-er'] = CLASSES['-é']  # "same endings as 2nd" (GRAM_004)
+
+# Infinitive endings on the folded spelling, most specific first
+INFINITIVE_RE = (
+    (re.compile(r'^(.+?)ere?$'), '-er'),
+    (re.compile(r'^(.+?)(?:a|aa+)$'), '-à'),
+    (re.compile(r'^(.+?)(?:e|ee+)$'), '-é'),
+    (re.compile(r'^(.+?)(?:i|ii+)$'), '-ì'),
+)
+STRESSED_ENDINGS = {'-à': 'àáa', '-é': 'èée', '-ì': 'ìíi'}
+
+
+def attach(stem, ending):
+    """stem + ending with the spelling rules of the examples
+
+    A stem's final i merges into an ending that starts with i ("mangià":
+    mi mangi), and a hard c/g keeps its sound before e/i ("giügà": mi giüghi).
+    """
+    if not ending:
+        return stem
+    if stem.endswith('i') and ending[0] == 'i':
+        return stem + ending[1:]
+    if stem[-1:] in ('c', 'g') and ending[0] in 'eèéiìí':
+        return stem + 'h' + ending
+    return stem + ending
+
+
+@lru_cache(maxsize=None)
+def paradigm(stem, conjugation_class):
+    """All generated forms of a stem; shared by every entry with that stem"""
+    endings = CLASSES[conjugation_class]
+    table = {}
+    for tense in ('present_tense', 'past_tense', 'future_tense'):
+        table[tense] = dict(zip(PERSONS, (attach(stem, ending) for ending in endings[tense])))
+    table['imperative'] = dict(zip(IMPERATIVE_PERSONS, (attach(stem, ending) for ending in endings['imperative'])))
+    for form in ('participle_past', 'participle_present', 'gerund'):
+        table[form] = attach(stem, endings[form])
+    return table
+
+
+def classify_infinitive(word):
+    """(stem, class) of an infinitive spelling, or None"""
+    folded = fold(word)
+    if not folded.endswith(('a', 'e', 'i', 'er', 'ere')):
+        return None
+    # A single unaccented final vowel is not an infinitive ending ("cùrra")
+    if folded[-1] in 'aei' and word[-1] == folded[-1] and folded[-2:-1] != folded[-1]:
+        return None
+    for pattern, conjugation_class in INFINITIVE_RE:
+        if pattern.match(folded):
+            if conjugation_class == '-er':
+                stem = word[:len(word) - (3 if folded.endswith('ere') else 2)]
+            else:
+                stem = word.rstrip(STRESSED_ENDINGS[conjugation_class])
+            return (stem, conjugation_class) if stem else None
+    return None
+
+
+def irregular_verbs(grammar_rules):
+    """Folded infinitives GRAM_004 lists as irregular"""
+    for rule in grammar_rules:
+        if rule.get('rule_id') == 'GRAM_004':
+            listed = rule.get('exceptions', '').partition(':')[2]
+            return {fold(verb) for verb in listed.split(',') if verb.strip()}
+    return set()
+
+
+def conjugate(entry, irregular):
+    """The verb_conjugations record of a vocabulary verb, or None if unclassified"""
+    head, _, particle = entry['ticinese'].strip().partition(' ')
+    suffix = f' {particle}' if particle else ''
+    record = {'verb_id': entry['word_id']}
+
+    infinitive = head
+    found = classify_infinitive(head)
+    if not entry.get('english', '').lower().startswith('to '):
+        # Filed under a conjugated form: find the infinitive it belongs to
+        variants = [variant for variant in entry.get('regional_variants', []) if classify_infinitive(variant)]
+        if variants:
+            infinitive, found = variants[0], classify_infinitive(variants[0])
+        elif fold(head).endswith('a') and len(head) > 1:
+            infinitive, found = head[:-1] + 'à', (head[:-1], '-à')
+        else:
+            return None
+
+    record['infinitive'] = infinitive + suffix
+    if fold(infinitive) in irregular:
+        record.update(verb_type='irregular', subject_pronoun_required=True,
+                      notes="Irregular (GRAM_004): suppletive forms are not generated")
+        return record
+    if not found:
+        return None
+
+    stem, conjugation_class = found
+    record.update(verb_type='regular', conjugation_class=conjugation_class)
+    for name, value in paradigm(stem, conjugation_class).items():
+        if isinstance(value, dict):
+            record[name] = {person: form + suffix for person, form in value.items()}
+        else:
+            record[name] = value + suffix
+    record['subject_pronoun_required'] = True
+    if infinitive != head:
+        record['notes'] = f"Vocabulary entry is the form '{entry['ticinese']}'"
+    return record
+
+
+def record_forms(record):
+    yield record['infinitive']
+    for name, value in record.items():
+        if name.endswith('_tense') or name == 'imperative':
+            yield from value.values()
+    if 'participle_past' in record:
+        masculine = record['participle_past']
+        head, _, particle = masculine.partition(' ')
+        # Participles agree with the subject (GRAM_017): vegnud, vegnuda, vegnude
+        for ending in ('a', 'e'):
+            yield head + ending + (f' {particle}' if particle else '')
+        yield masculine
+        yield record['participle_present']
+        yield record['gerund']
+
+
+def build_forms(records):
+    """Folded form -> word ids of the verbs it inflects"""
+    forms = {}
+    for record in records:
+        for form in record_forms(record):
+            ids = forms.setdefault(fold(form), [])
+            if record['verb_id'] not in ids:
+                ids.append(record['verb_id'])
+    return dict(sorted(forms.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-dir', default=DATABASE_DIR)
+    parser.add_argument('--output-dir', default=GENERATED_DIR)
+    args = parser.parse_args(argv)
+
+    vocabulary = load_database('vocabulary_expanded.json', 'vocabulary', args.database_dir)
+    irregular = irregular_verbs(load_database('grammar_rules.json', 'grammar_rules', args.database_dir))
+
+    verbs = [entry for entry in vocabulary if entry.get('part_of_speech') == 'verb']
+    records = [record for record in (conjugate(entry, irregular) for entry in verbs) if record]
+    forms = build_forms(records)
+
+    write_json(os.path.join(args.output_dir, CONJUGATIONS_FILENAME), {'verb_conjugations': records})
+    write_json(os.path.join(args.output_dir, FORMS_FILENAME), {'forms': forms})
+    irregular_count = sum(record['verb_type'] == 'irregular' for record in records)
+    print(f"Conjugated {len(records) - irregular_count} verbs ({irregular_count} irregular, "
+          f"{len(verbs) - len(records)} unclassified, {paradigm.cache_info().currsize} paradigms): "
+          f"{len(forms)} forms -> {args.output_dir}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
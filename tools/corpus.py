@@ -0,0 +1,207 @@
+"""
+Shared helpers for the offline build tools: locating and loading the
+database files, writing generated artifacts, and tokenizing/matching
+Ticinese text against the vocabulary.
+"""
+
+import json
+import os
+import re
+import unicodedata
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE_DIR = os.path.join(ROOT_DIR, 'database')
+GENERATED_DIR = os.path.join(DATABASE_DIR, 'generated')
+
+# Letters (including accented and umlauted vowels); apostrophes and
+# everything else separate tokens, so "gh'ha" is "gh" + "ha".
+WORD_RE = re.compile(r"[^\W\d_]+")
+
+
+def database_path(filename, database_dir=DATABASE_DIR):
+    return os.path.join(database_dir, filename)
+
+
+def load_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_database(filename, list_key, database_dir=DATABASE_DIR):
+    """Return the record list stored under list_key in a database file"""
+    return load_json(database_path(filename, database_dir)).get(list_key, [])
+
+
+def write_json(path, data, pretty=False):
+    """Write a generated artifact; compact by default since browsers download it"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        if pretty:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        else:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def write_record_field(path, id_field, field, values):
+    """Set field on records of a hand-formatted database file, in place
+
+    values maps record id -> JSON value. Each value is written as one
+    compact line right after the record's id line (replacing the line
+    left by a previous run), so the rest of the file keeps its
+    hand-written layout. The result is re-parsed before it is saved.
+    """
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().split('\n')
+    id_line = re.compile(r'^(\s*)"%s": "([^"]+)",$' % re.escape(id_field))
+    prefix = f'"{field}": '
+
+    output = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        output.append(line)
+        i += 1
+        match = id_line.match(line)
+        if not match or match.group(2) not in values:
+            continue
+        if i < len(lines) and lines[i].strip().startswith(prefix):
+            i += 1
+        value = json.dumps(values[match.group(2)], ensure_ascii=False, separators=(', ', ': '))
+        output.append(f'{match.group(1)}{prefix}{value},')
+
+    text = '\n'.join(output)
+    json.loads(text)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def normalize(word):
+    """Fold a token for matching: NFC, lowercase, typographic apostrophes"""
+    return unicodedata.normalize('NFC', word).lower().replace('’', "'")
+
+
+def fold(word):
+    """Lowercase without accents, so "tì" and "ti" compare equal"""
+    decomposed = unicodedata.normalize('NFD', word.strip().lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _nfc_offsets(text):
+    """NFC form of text, and the offset in text of each of its characters (plus the end)"""
+    if unicodedata.is_normalized('NFC', text):
+        return text, range(len(text) + 1)
+    pieces = []
+    offsets = []
+    start = 0
+    # Each base character composes only with the combining marks after it
+    for i in range(1, len(text) + 1):
+        if i == len(text) or not unicodedata.combining(text[i]):
+            piece = unicodedata.normalize('NFC', text[start:i])
+            pieces.append(piece)
+            offsets.extend([start] * len(piece))
+            start = i
+    offsets.append(len(text))
+    return ''.join(pieces), offsets
+
+
+def tokenize(text):
+    """Yield (normalized token, start, end) for every word in text
+
+    Words are found in the NFC form, so a decomposed accent stays inside its
+    word, but start and end are offsets into text as given.
+    """
+    normalized, offsets = _nfc_offsets(text)
+    for match in WORD_RE.finditer(normalized):
+        yield normalize(match.group()), offsets[match.start()], offsets[match.end()]
+
+
+def phrase_key(phrase):
+    """Token tuple used as the matching key of a (possibly multi-word) entry"""
+    return tuple(token for token, _, _ in tokenize(phrase))
+
+
+class LexiconMatcher:
+    """Token trie over lexicon entries with leftmost-longest matching
+
+    Entries may span several tokens ("fregà sù"); scanning a text walks the
+    trie once from each token, so a pass costs O(tokens x longest entry)
+    and overlapping entries resolve to the longest one instead of being
+    replaced twice.
+    """
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, phrase, value, replace=False):
+        """Register value for phrase; the first value wins unless replace is set"""
+        key = phrase_key(phrase) if isinstance(phrase, str) else tuple(phrase)
+        if not key:
+            return
+        node = self.root
+        for token in key:
+            node = node.setdefault(token, {})
+        if replace or None not in node:
+            node[None] = value
+
+    def overlay(self, base):
+        """New matcher with this matcher's entries layered over base's
+
+        Only the paths this matcher touches are copied, so overlaying a few
+        entries on the full lexicon stays cheap.
+        """
+        merged = LexiconMatcher()
+        merged.root = _merge_nodes(self.root, base.root)
+        return merged
+
+    def lookup(self, phrase):
+        node = self.root
+        for token in phrase_key(phrase):
+            node = node.get(token)
+            if node is None:
+                return None
+        return node.get(None)
+
+    def scan(self, text):
+        """Yield (start, end, value) for non-overlapping leftmost-longest matches"""
+        tokens = list(tokenize(text))
+        i = 0
+        while i < len(tokens):
+            node = self.root
+            best = None
+            j = i
+            while j < len(tokens):
+                node = node.get(tokens[j][0])
+                if node is None:
+                    break
+                if None in node:
+                    best = (j, node[None])
+                j += 1
+            if best is None:
+                i += 1
+                continue
+            last, value = best
+            yield tokens[i][1], tokens[last][2], value
+            i = last + 1
+
+
+def vocabulary_matcher(vocabulary):
+    """Matcher from every vocabulary spelling (and regional variant) to its record
+
+    When several entries share a spelling the first one keeps it.
+    """
+    matcher = LexiconMatcher()
+    for word in vocabulary:
+        matcher.add(word['ticinese'], word)
+        for variant in word.get('regional_variants') or []:
+            matcher.add(variant, word)
+    return matcher
+
+
+def _merge_nodes(primary, secondary):
+    merged = dict(secondary)
+    for token, child in primary.items():
+        if token is not None and token in secondary:
+            merged[token] = _merge_nodes(child, secondary[token])
+        else:
+            merged[token] = child
+    return merged
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic corpus for scale testing.
+
+Writes schema-conformant vocabulary_expanded.json, stories.json,
+scenarios.json and recipes.json into --output-dir, and copies the other
+database files next to them so the directory works as a drop-in
+database/. The defaults reproduce the size of the real corpus; --scale
+multiplies every count and --words/--stories/--scenarios/--recipes set
+them individually:
+
+    python tools/generate_corpus.py --output-dir /tmp/big/database --scale 100
+
+Output is deterministic for a given --seed and counts. Records are
+streamed to disk one at a time; only the vocabulary spellings are kept in
+memory, so that stories, dialogue and recipes use words that resolve
+against the generated vocabulary. Every dialogue_tree is a valid graph:
+all `next` links exist, every node is reachable from `opening`, and
+every path ends at a node with a completion_note.
+"""
+
+import argparse
+import glob
+import itertools
+import json
+import os
+import random
+import shutil
+import sys
+
+from corpus import DATABASE_DIR
+
+GENERATED_FILES = ('vocabulary_expanded.json', 'stories.json', 'scenarios.json', 'recipes.json')
+
+# Size of the real corpus, multiplied by --scale
+BASE_COUNTS = {'words': 1284, 'stories': 14, 'scenarios': 6, 'recipes': 20}
+
+ONSETS = ('b', 'c', 'd', 'f', 'g', 'l', 'm', 'n', 'p', 'r', 's', 't', 'v', 'z',
+          'ch', 'gh', 'sc', 'br', 'tr', 'pr', 'gr', 'st', 'sp')
+VOWELS = ('a', 'e', 'i', 'o', 'u', 'a', 'e', 'o', 'ö', 'ü', 'è', 'à')
+CODAS = ('', '', '', 'n', 'r', 'l', 't', 'ss', 'sch', 'm')
+
+ENGLISH_WORDS = (
+    'bread', 'cheese', 'milk', 'water', 'wine', 'house', 'door', 'window', 'roof',
+    'mountain', 'valley', 'river', 'stone', 'bridge', 'meadow', 'forest', 'tree',
+    'cow', 'goat', 'dog', 'cat', 'horse', 'bird', 'mother', 'father', 'child',
+    'grandmother', 'brother', 'sister', 'friend', 'priest', 'market', 'church',
+    'morning', 'evening', 'winter', 'summer', 'snow', 'rain', 'sun', 'fire',
+    'kitchen', 'pot', 'spoon', 'table', 'chair', 'bed', 'hand', 'head', 'heart',
+    'walk', 'eat', 'drink', 'sleep', 'work', 'sing', 'pray', 'carry', 'cook',
+    'big', 'small', 'old', 'new', 'good', 'cold', 'warm', 'happy', 'tired',
+)
+ITALIAN_WORDS = (
+    'pane', 'formaggio', 'latte', 'acqua', 'vino', 'casa', 'porta', 'finestra',
+    'montagna', 'valle', 'fiume', 'pietra', 'ponte', 'prato', 'bosco', 'albero',
+    'mucca', 'capra', 'cane', 'gatto', 'madre', 'padre', 'bambino', 'nonna',
+    'mercato', 'chiesa', 'mattina', 'sera', 'inverno', 'estate', 'neve', 'fuoco',
+    'cucina', 'pentola', 'tavolo', 'mano', 'cuore', 'camminare', 'mangiare',
+    'bere', 'dormire', 'lavorare', 'cantare', 'grande', 'piccolo', 'vecchio',
+)
+PARTS_OF_SPEECH = ('noun', 'noun', 'noun', 'verb', 'verb', 'adjective', 'adverb', 'preposition')
+CATEGORIES = ('general', 'verbs', 'body', 'household_kitchen', 'tools', 'numbers',
+              'food_basics', 'animals_domestic', 'plants_trees', 'nature_earth', 'time', 'family')
+LEVELS = ('A1', 'A1', 'A1-A2', 'A2', 'A2-B1', 'B1')
+RECIPE_CATEGORIES = ('everyday_dishes', 'festival_foods', 'preservation_techniques')
+SCENARIO_CATEGORIES = ('marketplace_interaction', 'family_traditions', 'community_events',
+                       'traditional_crafts', 'alpine_traditions')
+FIRST_NAMES = ('Maria', 'Giuseppe', 'Rosa', 'Carlo', 'Elena', 'Pietro', 'Lucia', 'Marco',
+               'Giovanna', 'Antonio', 'Francesca', 'Matteo')
+TITLES = ('Nonna', 'Signor', 'Signora', 'Maestro', 'Don', 'Pastore')
+PLACES = ('Maggia', 'Bignasco', 'Cevio', 'Sonogno', 'Airolo', 'Biasca', 'Locarno', 'Intragna')
+
+
+def seeded(seed, name):
+    """Independent random stream per collection, stable for a given seed"""
+    return random.Random(f'{seed}:{name}')
+
+
+def make_spelling(rng):
+    return ''.join(rng.choice(ONSETS) + rng.choice(VOWELS) + rng.choice(CODAS)
+                   for _ in range(rng.choice((1, 2, 2, 2, 3))))
+
+
+class Lexicon:
+    """Spellings and glosses of the generated vocabulary, with Zipf-like sampling"""
+
+    def __init__(self, size, seed):
+        rng = seeded(seed, 'lexicon')
+        self.words = []
+        seen = set()
+        while len(self.words) < size:
+            spelling = make_spelling(rng)
+            if spelling not in seen:
+                seen.add(spelling)
+                self.words.append((spelling, rng.choice(ENGLISH_WORDS)))
+        self.cumulative = list(itertools.accumulate(1 / rank for rank in range(1, size + 1)))
+
+    def sample(self, rng, count):
+        return rng.choices(self.words, cum_weights=self.cumulative, k=count)
+
+    def sentence(self, rng, length):
+        words = [spelling for spelling, _ in self.sample(rng, length)]
+        return words[0].capitalize() + ' ' + ' '.join(words[1:]) + '.'
+
+    def text(self, rng, sentences):
+        return ' '.join(self.sentence(rng, rng.randint(4, 9)) for _ in range(sentences))
+
+
+def generate_vocabulary(lexicon, seed):
+    rng = seeded(seed, 'vocabulary')
+    for i, (spelling, english) in enumerate(lexicon.words, 1):
+        example = lexicon.sentence(rng, rng.randint(4, 7))
+        yield {
+            'word_id': f'SYNTH_{i:06d}',
+            'ticinese': spelling,
+            'english': english,
+            'italian_standard': rng.choice(ITALIAN_WORDS),
+            'part_of_speech': rng.choice(PARTS_OF_SPEECH),
+            'gender': rng.choice(('masculine', 'feminine', 'n/a')),
+            'number': 'singular',
+            'pronunciation_simple': spelling,
+            'pronunciation_ipa': '',
+            'category': rng.choice(CATEGORIES),
+            'subcategory': '',
+            'example_sentence_ticinese': example,
+            'example_sentence_english': f'An example with "{english}".',
+            'usage_notes': '',
+            'etymology_latin': '',
+            'etymology_notes': '',
+            'regional_variants': [make_spelling(rng)] if rng.random() < 0.1 else [],
+            'frequency': 'common' if i <= len(lexicon.words) // 100 else rng.choice(('uncommon', 'rare')),
+            'time_period': '1850-1915',
+            'source': 'Synthetic corpus (tools/generate_corpus.py)',
+        }
+
+
+def generate_stories(lexicon, count, seed):
+    rng = seeded(seed, 'stories')
+    for i in range(1, count + 1):
+        text = '\n\n'.join(lexicon.text(rng, rng.randint(3, 5)) for _ in range(rng.randint(3, 5)))
+        tokens = text.split()
+        focus = {}
+        for spelling, english in lexicon.sample(rng, 12):
+            focus.setdefault(spelling, english)
+        yield {
+            'story_id': f'SYNTH_STORY_{i:05d}',
+            'title': lexicon.sentence(rng, 2).rstrip('.'),
+            'title_english': f'Story {i}',
+            'level': rng.choice(LEVELS),
+            'word_count': len(tokens),
+            'unique_words': len(set(tokens)),
+            'target_grammar': rng.sample(('present tense', 'possessives', 'subject pronouns',
+                                          'past tense', 'negation'), 2),
+            'text': text,
+            'translation': f'Translation of story {i}.',
+            'vocabulary_focus': [{'ticinese': t, 'english': e} for t, e in focus.items()],
+            'comprehension_questions': [lexicon.sentence(rng, 5)[:-1] + '?' for _ in range(3)],
+            'cultural_notes': f'Synthetic story set in {rng.choice(PLACES)}.',
+        }
+
+
+def dialogue_links(rng, size):
+    """Edges of a DAG over size nodes: every node reachable from 0, only the last has no exit"""
+    children = {node: set() for node in range(size)}
+    for node in range(1, size):
+        children[rng.randrange(node)].add(node)
+    for node in range(size - 1):
+        while len(children[node]) < min(rng.randint(1, 3), size - 1 - node):
+            children[node].add(rng.randrange(node + 1, size))
+    return {node: sorted(targets) for node, targets in children.items()}
+
+
+def generate_scenarios(lexicon, count, seed):
+    rng = seeded(seed, 'scenarios')
+    for i in range(1, count + 1):
+        characters = [{
+            'name': f'{rng.choice(TITLES)} {name}',
+            'age': f'{rng.randint(8, 80)} anni',
+            'role': rng.choice(('vendor', 'neighbor', 'elder', 'child', 'artisan')),
+            'personality': 'synthetic',
+            'background': 'synthetic',
+            'speaking_style': 'synthetic',
+        } for name in rng.sample(FIRST_NAMES, 3)]
+        size = rng.randint(4, 10)
+        keys = ['opening'] + [f'node_{n}' for n in range(1, size)]
+        tree = {}
+        for node, targets in dialogue_links(rng, size).items():
+            entry = {
+                'speaker': rng.choice(characters)['name'],
+                'text': lexicon.sentence(rng, rng.randint(5, 10)),
+                'translation': 'Synthetic line.',
+            }
+            if node:
+                entry['vocabulary_learned'] = [spelling for spelling, _ in lexicon.sample(rng, rng.randint(2, 6))]
+                entry['cultural_note'] = 'Synthetic cultural note.'
+            if targets:
+                entry['responses'] = [{
+                    'choice': lexicon.sentence(rng, rng.randint(3, 6)),
+                    'translation': 'Synthetic choice.',
+                    'next': keys[target],
+                } for target in targets]
+            else:
+                entry['cultural_learning'] = ['synthetic']
+                entry['completion_note'] = 'Scenario complete.'
+            tree[keys[node]] = entry
+        yield {
+            'scenario_id': f'SYNTH_SCENARIO_{i:05d}',
+            'title': lexicon.sentence(rng, 3).rstrip('.'),
+            'title_english': f'Scenario {i}',
+            'category': rng.choice(SCENARIO_CATEGORIES),
+            'difficulty_level': rng.choice(('A1-A2', 'A2', 'A2-B1')),
+            'cultural_period': '1900',
+            'estimated_duration': '10-15 minutes',
+            'setting': {
+                'location': rng.choice(PLACES),
+                'time': 'Mattina',
+                'season': rng.choice(('Primavera', 'Estate', 'Autunno', 'Inverno')),
+                'atmosphere': 'synthetic',
+                'description': lexicon.text(rng, 3),
+            },
+            'characters': characters,
+            'vocabulary_focus': ['synthetic'],
+            'cultural_learning': ['synthetic'],
+            'learning_objectives': ['synthetic'],
+            'dialogue_tree': tree,
+        }
+
+
+def generate_recipes(lexicon, count, seed):
+    rng = seeded(seed, 'recipes')
+    for i in range(1, count + 1):
+        def phrase(length):
+            return ' '.join(spelling for spelling, _ in lexicon.sample(rng, length))
+
+        yield {
+            'recipe_id': f'SYNTH_RECIPE_{i:05d}',
+            'ticinese_name': phrase(2).title(),
+            'english_name': f'Recipe {i}',
+            'category': rng.choice(RECIPE_CATEGORIES),
+            'difficulty_level': rng.choice(('A1', 'A2', 'B1', 'B2')),
+            'cultural_significance': lexicon.text(rng, 2),
+            'historical_period': '1850-1915',
+            'region': f'{rng.choice(PLACES)}, Ticino',
+            'serves': f'{rng.randint(2, 8)} persone',
+            'preparation_time': f'{rng.randint(1, 12) * 5} minuti',
+            'cooking_time': f'{rng.randint(1, 24) * 5} minuti',
+            'ingredients': [{
+                'ticinese': phrase(2),
+                'english': rng.choice(ENGLISH_WORDS),
+                'amount': f'{rng.randint(1, 10) * 50}g',
+                'vocabulary_id': f'VOCAB_{n:03d}',
+                'cultural_note': 'Synthetic ingredient.',
+            } for n in range(1, rng.randint(3, 8) + 1)],
+            'kitchen_tools': [{
+                'ticinese': phrase(1),
+                'english': rng.choice(ENGLISH_WORDS),
+                'cultural_note': 'Synthetic tool.',
+            } for _ in range(rng.randint(1, 4))],
+            'instructions': [{
+                'step': step,
+                'ticinese': lexicon.sentence(rng, rng.randint(5, 12)),
+                'english': 'Synthetic step.',
+                'vocabulary_focus': [spelling for spelling, _ in lexicon.sample(rng, 4)],
+                'cultural_note': 'Synthetic note.',
+                'technique_tip': 'Synthetic tip.',
+            } for step in range(1, rng.randint(4, 10) + 1)],
+            'family_story': lexicon.text(rng, 4),
+            'vocabulary_learning': {
+                f'theme_{n}': [spelling for spelling, _ in lexicon.sample(rng, 5)]
+                for n in range(1, rng.randint(2, 5) + 1)
+            },
+            'comprehension_questions': [{
+                'ticinese': lexicon.sentence(rng, 5)[:-1] + '?',
+                'english': 'Synthetic question?',
+                'answer': 'Synthetic answer.',
+            } for _ in range(3)],
+            'cultural_context': {'social_significance': 'synthetic'},
+            'learning_objectives': ['synthetic'],
+        }
+
+
+def stream_json(path, header, list_key, records):
+    """Write {header..., list_key: [records...]} one record at a time"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{\n')
+        for key, value in header.items():
+            f.write(f'  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},\n')
+        f.write(f'  {json.dumps(list_key)}: [')
+        for i, record in enumerate(records):
+            f.write(',\n    ' if i else '\n    ')
+            f.write(json.dumps(record, ensure_ascii=False))
+        f.write('\n  ]\n}\n')
+
+
+def generate(output_dir, counts, seed, copy_others=True):
+    """Write a synthetic database/ into output_dir"""
+    if os.path.abspath(output_dir) == os.path.abspath(DATABASE_DIR):
+        raise ValueError("refusing to overwrite the real database directory")
+    os.makedirs(output_dir, exist_ok=True)
+
+    lexicon = Lexicon(counts['words'], seed)
+    header = {'database_info': {'name': 'Synthetic corpus', 'seed': seed, 'counts': counts}}
+    stream_json(os.path.join(output_dir, 'vocabulary_expanded.json'), header, 'vocabulary',
+                generate_vocabulary(lexicon, seed))
+    stream_json(os.path.join(output_dir, 'stories.json'), header, 'stories',
+                generate_stories(lexicon, counts['stories'], seed))
+    stream_json(os.path.join(output_dir, 'scenarios.json'), {'metadata': header['database_info']},
+                'scenarios', generate_scenarios(lexicon, counts['scenarios'], seed))
+    stream_json(os.path.join(output_dir, 'recipes.json'), {'metadata': header['database_info']},
+                'recipes', generate_recipes(lexicon, counts['recipes'], seed))
+
+    if copy_others:
+        for path in glob.glob(os.path.join(DATABASE_DIR, '*.json')):
+            if os.path.basename(path) not in GENERATED_FILES:
+                shutil.copy(path, output_dir)
+
+
+def scaled_counts(scale=1.0, **overrides):
+    counts = {name: max(1, round(base * scale)) for name, base in BASE_COUNTS.items()}
+    counts.update({name: value for name, value in overrides.items() if value is not None})
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output-dir', required=True)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scale', type=float, default=1.0, help="multiply the real corpus sizes")
+    for name in BASE_COUNTS:
+        parser.add_argument(f'--{name}', type=int, help=f"number of {name} (overrides --scale)")
+    parser.add_argument('--no-copy', action='store_true',
+                        help="only write the four generated files")
+    args = parser.parse_args(argv)
+
+    counts = scaled_counts(args.scale, **{name: getattr(args, name) for name in BASE_COUNTS})
+    if counts['words'] < 1:
+        parser.error("--words must be at least 1")
+    for name in BASE_COUNTS:
+        if counts[name] < 0:
+            parser.error(f"--{name} must not be negative")
+    try:
+        generate(args.output_dir, counts, args.seed, copy_others=not args.no_copy)
+    except ValueError as error:
+        parser.error(str(error))
+    print(f"Generated {counts['words']} words, {counts['stories']} stories, "
+          f"{counts['scenarios']} scenarios, {counts['recipes']} recipes -> {args.output_dir}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
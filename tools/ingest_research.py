@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Turn research notes into review-ready vocabulary candidates (NDJSON).
+
+The files in research_data/ are saved search-assistant pages: the query,
+the site's navigation and history, the answer, then a sources/follow-up
+footer. Each file is streamed line by line; the page chrome and footer
+are dropped, as are the citation names glued to sentence ends ("...red).
+youtube"). Terms the answer highlights end in U+FEFF and continue on the
+next line, so lines are rejoined there and the marks kept. An entry like
+
+    ross (red) — IPA: [rɔs] — ... feminine singular rossa, ... Example:
+    La poma a l'è rossa (The apple is red).
+
+becomes one candidate per highlighted headword ("blöö or blu (blue) —
+IPA: [bløː] or [blu]" gives two):
+
+    {"source": "research_data/07_adjectives_adverbs.txt", "line": 44,
+     "section": "Color Adjectives", "ticinese": "ross", "english": "red",
+     "ipa": "rɔs", "forms": ["rossa", "rossi", "rosse"],
+     "example": "La poma a l'è rossa", "example_translation": "The apple is red",
+     "status": "variant", "matches": [{"word_id": "TICIN_0946"}, ...]}
+
+`status` comes from hash lookups of the folded spelling and gloss in
+vocabulary_expanded.json and vocabulary.json (and the verb forms of
+generated/inflected_forms.json when present):
+
+    known        the spelling is in the lexicon with an overlapping gloss
+    homograph    the spelling is in the lexicon with another meaning
+    inflected    the spelling is a generated form of a known verb
+    variant      new spelling of a gloss the lexicon already has
+    new          neither spelling nor gloss is known
+
+Files are parsed in parallel worker processes (--jobs); lines are
+written in file order as each file finishes. A summary goes to stderr.
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from corpus import DATABASE_DIR, ROOT_DIR, database_path, fold, load_database, load_json
+
+RESEARCH_DIR = os.path.join(ROOT_DIR, 'research_data')
+
+MARK = '\ufeff'
+CITATION = '\u200b'
+STATUSES = ('new', 'variant', 'inflected', 'homograph', 'known')
+
+# Page chrome around the answer
+ANSWER_START = 'Assistant steps'
+FOOTER_RE = re.compile(r'^\d+ sources$')
+CHROME = {
+    'Home', 'Travel', 'Shopping', 'Academic', 'Sports', 'Library', 'View All',
+    'Discover', 'Spaces', 'Finance', 'Account', 'Upgrade', 'Install', 'Share',
+    'Download Comet', 'Answer', 'Images', 'Test your knowledge',
+    'Generate flashcards', 'Quiz me on this topic', 'Ask a follow-up',
+}
+CITATION_RE = re.compile(r'(?<=[.)])[\w.-]+' + CITATION + r'$')
+
+ENTRY_RE = re.compile(
+    r'^(?P<heads>[^()]+?)\s*\((?P<gloss>[^)]+)\)\s*—\s*IPA:\s*'
+    r'(?P<ipa>\[[^\]]+\](?:\s*or\s*\[[^\]]+\])*)\s*(?:—\s*(?P<rest>.*))?$')
+IPA_RE = re.compile(r'\[([^\]]+)\]')
+MARKED_RE = re.compile(r'([^\s,.;:()' + MARK + r']+)' + MARK)
+EXAMPLE_RE = re.compile(r'Example:\s*(?P<text>[^()]+?)\s*\((?P<translation>[^)]+)\)')
+GLOSS_SPLIT_RE = re.compile(r'[,;/]')
+
+
+def answer_lines(path):
+    """Yield (line number, logical line) of a research file, without page chrome
+
+    Highlighted terms end in MARK and continue on the next line; those
+    lines are joined, marks kept, and trailing citation names removed.
+    The answer marker is passed on as a line of its own, so callers can
+    forget headings seen in the page's history list.
+    """
+    pending, first = '', None
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.rstrip('\n')
+            if FOOTER_RE.match(line.strip()):
+                break
+            if first is None:
+                first = number
+            pending += line
+            if line.endswith(MARK):
+                continue
+            text = CITATION_RE.sub('', pending.strip()).replace(CITATION, '').strip()
+            if text and text not in CHROME:
+                yield first, text
+            pending, first = '', None
+    if pending.strip():
+        yield first, pending.strip()
+
+
+def is_heading(text):
+    return MARK not in text and len(text) < 60 and not text.endswith(('.', ':', ')'))
+
+
+def gloss_keys(gloss):
+    """Folded glosses: "big, large" -> {"big", "large"}; "to eat" -> {"eat"}"""
+    keys = set()
+    for part in GLOSS_SPLIT_RE.split(gloss):
+        part = fold(part)
+        if part.startswith('to '):
+            part = part[3:]
+        if part:
+            keys.add(part)
+    return keys
+
+
+def parse_entries(path):
+    """Yield candidate dicts (without lexicon status) for one research file"""
+    section = None
+    for number, text in answer_lines(path):
+        if text == ANSWER_START:
+            section = None
+            continue
+        if is_heading(text):
+            section = text
+            continue
+        match = ENTRY_RE.match(text)
+        if not match:
+            continue
+        heads = MARKED_RE.findall(match.group('heads'))
+        if not heads:
+            continue
+        ipas = IPA_RE.findall(match.group('ipa'))
+        rest = match.group('rest') or ''
+        example = EXAMPLE_RE.search(rest)
+        # Inflected forms share the headword's beginning; other marked words are cross-references
+        stem = fold(heads[0])[:3]
+        forms = []
+        for form in MARKED_RE.findall(rest[:example.start()] if example else rest):
+            if fold(form).startswith(stem) and form not in heads + forms:
+                forms.append(form)
+        for i, head in enumerate(heads):
+            candidate = {
+                'line': number,
+                'section': section,
+                'ticinese': head,
+                'english': match.group('gloss').strip(),
+                'ipa': ipas[i] if len(ipas) == len(heads) else ipas[0],
+                'forms': forms,
+            }
+            if example:
+                candidate['example'] = example.group('text').replace(MARK, '').strip()
+                candidate['example_translation'] = example.group('translation').strip()
+            yield candidate
+
+
+def build_lexicon(database_dir=DATABASE_DIR):
+    """Hash indexes the candidates are checked against"""
+    spellings, glosses = {}, {}
+    for filename in ('vocabulary_expanded.json', 'vocabulary.json'):
+        if not os.path.exists(database_path(filename, database_dir)):
+            continue
+        for entry in load_database(filename, 'vocabulary', database_dir):
+            summary = {key: entry.get(key) for key in ('word_id', 'ticinese', 'english', 'pronunciation_ipa')}
+            matches = spellings.setdefault(fold(entry.get('ticinese', '')), [])
+            if summary not in matches:
+                matches.append(summary)
+            for key in gloss_keys(entry.get('english', '')):
+                ids = glosses.setdefault(key, [])
+                if entry['word_id'] not in ids:
+                    ids.append(entry['word_id'])
+    forms_path = os.path.join(database_dir, 'generated', 'inflected_forms.json')
+    inflections = load_json(forms_path)['forms'] if os.path.exists(forms_path) else {}
+    return {'spellings': spellings, 'glosses': glosses, 'inflections': inflections}
+
+
+def classify(candidate, lexicon):
+    """Add status and matches to a candidate"""
+    keys = gloss_keys(candidate['english'])
+    matches = lexicon['spellings'].get(fold(candidate['ticinese']), [])
+    if matches:
+        overlapping = any(keys & gloss_keys(match['english'] or '') for match in matches)
+        candidate['status'] = 'known' if overlapping else 'homograph'
+        candidate['matches'] = matches
+    elif fold(candidate['ticinese']) in lexicon['inflections']:
+        candidate['status'] = 'inflected'
+        candidate['matches'] = [{'word_id': word_id} for word_id in lexicon['inflections'][fold(candidate['ticinese'])]]
+    else:
+        same_meaning = sorted({word_id for key in keys for word_id in lexicon['glosses'].get(key, [])})
+        candidate['status'] = 'variant' if same_meaning else 'new'
+        candidate['matches'] = [{'word_id': word_id} for word_id in same_meaning]
+    return candidate
+
+
+_lexicon = None
+
+
+def init_worker(lexicon):
+    global _lexicon
+    _lexicon = lexicon
+
+
+def ingest_file(path):
+    """(status, NDJSON line) of every candidate in one research file (runs in a worker process)"""
+    path = os.path.abspath(path)
+    inside = path.startswith(ROOT_DIR + os.sep)
+    source = os.path.relpath(path, ROOT_DIR).replace(os.sep, '/') if inside else path
+    lines = []
+    for candidate in parse_entries(path):
+        record = {'source': source}
+        record.update(classify(candidate, _lexicon))
+        lines.append((record['status'], json.dumps(record, ensure_ascii=False)))
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('files', nargs='*', help="research files (default: research_data/*.txt)")
+    parser.add_argument('--database-dir', default=DATABASE_DIR)
+    parser.add_argument('--output', help="write NDJSON here instead of stdout")
+    parser.add_argument('--status', default=','.join(STATUSES),
+                        help="comma-separated statuses to emit (e.g. new,variant)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="worker processes")
+    args = parser.parse_args(argv)
+
+    paths = args.files or sorted(glob.glob(os.path.join(RESEARCH_DIR, '*.txt')))
+    wanted = {status.strip() for status in args.status.split(',') if status.strip()}
+    unknown = wanted - set(STATUSES)
+    if unknown:
+        parser.error(f"unknown status(es): {', '.join(sorted(unknown))}")
+
+    lexicon = build_lexicon(args.database_dir)
+    counts = Counter()
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        jobs = max(1, min(args.jobs or 1, len(paths) or 1))
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(lexicon,)) as pool:
+            for lines in pool.map(ingest_file, paths, chunksize=max(1, len(paths) // (jobs * 4))):
+                for status, line in lines:
+                    counts[status] += 1
+                    if status in wanted:
+                        output.write(line + '\n')
+    finally:
+        if args.output:
+            output.close()
+
+    print(f"Ingested {len(paths)} files: {sum(counts.values())} candidates ("
+          + ', '.join(f"{counts[status]} {status}" for status in STATUSES) + ")", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Split recipes.json into a listing index and one file per recipe.
+
+The recipe list only needs names, badges and a few counts; the full
+ingredients, instructions, family story and vocabulary of a recipe are
+fetched when it is opened (or hovered). Output:
+
+    database/generated/recipes/index.json
+    {"recipes": [{"recipe_id": "RECIPE_001", "ticinese_name": "...", ...,
+                  "ingredient_count": 7, "step_count": 6,
+                  "vocabulary_theme_count": 4}, ...]}
+
+    database/generated/recipes/RECIPE_001.json     the full record
+
+recipes.json stays the file that is edited; shards of recipes that no
+longer exist are removed.
+"""
+
+import argparse
+import glob
+import os
+import sys
+
+from corpus import DATABASE_DIR, GENERATED_DIR, load_database, write_json
+
+OUTPUT_DIRNAME = 'recipes'
+INDEX_FILENAME = 'index.json'
+
+# Fields the recipe cards and the recipe header render before the shard arrives
+LISTING_FIELDS = (
+    'recipe_id', 'ticinese_name', 'english_name', 'category', 'difficulty_level',
+    'cultural_significance', 'historical_period', 'region', 'serves',
+    'preparation_time', 'cooking_time', 'metrics',
+)
+
+
+def listing(recipe):
+    entry = {field: recipe[field] for field in LISTING_FIELDS if field in recipe}
+    entry['ingredient_count'] = len(recipe.get('ingredients', []))
+    entry['step_count'] = len(recipe.get('instructions', []))
+    entry['vocabulary_theme_count'] = len(recipe.get('vocabulary_learning', {}))
+    return entry
+
+
+def write_shards(recipes, output_dir):
+    """Write the index and per-recipe files; return the number of stale shards removed"""
+    write_json(os.path.join(output_dir, INDEX_FILENAME),
+               {'recipes': [listing(recipe) for recipe in recipes]})
+    for recipe in recipes:
+        write_json(os.path.join(output_dir, f"{recipe['recipe_id']}.json"), recipe)
+
+    current = {f"{recipe['recipe_id']}.json" for recipe in recipes} | {INDEX_FILENAME}
+    removed = 0
+    for path in glob.glob(os.path.join(output_dir, '*.json')):
+        if os.path.basename(path) not in current:
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-dir', default=DATABASE_DIR)
+    parser.add_argument('--output-dir', default=os.path.join(GENERATED_DIR, OUTPUT_DIRNAME))
+    args = parser.parse_args(argv)
+
+    recipes = load_database('recipes.json', 'recipes', args.database_dir)
+    removed = write_shards(recipes, args.output_dir)
+
+    index_size = os.path.getsize(os.path.join(args.output_dir, INDEX_FILENAME))
+    print(f"Sharded {len(recipes)} recipes (index {index_size / 1024:.1f} KB"
+          f"{f', removed {removed} stale' if removed else ''}) -> {args.output_dir}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
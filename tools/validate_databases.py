@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+"""
+Validate the database files against their schemas.
+
+The schemas below describe every record list: field types, required fields,
+allowed values and nested objects, following database/SCHEMA_DESIGN.md
+where the data matches it and the data where the document is out of
+date. Each schema is compiled once into a Python function with one inline
+check per field, so a record is validated by straight-line code instead
+of a walk over the schema (--show-code TABLE prints the function). Files
+are validated in parallel worker processes, each streaming its records
+from disk one at a time.
+
+Violations are errors (wrong type, missing required field, value outside
+its allowed set, duplicate id) or warnings (unknown fields and content
+checks: italian_standard copied from english, a subject pronoun filed as
+another part of speech, unpaired grammar examples). Every violation is
+reported; the exit status is 1 when there are errors, or any warnings
+with --strict.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+
+from corpus import DATABASE_DIR, database_path, fold, load_database
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+ID_PATTERN = r'^[A-Z]+(?:_[A-Z]+)*_\d+$'
+CEFR_PATTERN = r'^(?:A1|A2|B1|B2|C1|C2)(?:-(?:A1|A2|B1|B2|C1|C2))?$'
+SNAKE_CASE_PATTERN = r'^[a-z][a-z0-9_]*$'
+
+
+def text(required=False, choices=None, pattern=None, nullable=False):
+    """A string; required strings must also be non-blank"""
+    return {'type': 'str', 'required': required, 'choices': choices,
+            'pattern': pattern, 'nullable': nullable}
+
+
+def integer(required=False, minimum=None):
+    return {'type': 'int', 'required': required, 'minimum': minimum}
+
+
+def boolean(required=False):
+    return {'type': 'bool', 'required': required}
+
+
+def array(items=None, required=False):
+    return {'type': 'list', 'required': required, 'items': items}
+
+
+def mapping(values=None, required=False):
+    """An object with arbitrary keys whose values all follow one spec"""
+    return {'type': 'map', 'required': required, 'values': values}
+
+
+def record(fields, required=False):
+    """An object with known fields; others are reported as unknown"""
+    return {'type': 'object', 'required': required, 'fields': fields}
+
+
+VOCABULARY = record({
+    'word_id': text(required=True, pattern=ID_PATTERN),
+    'ticinese': text(required=True),
+    'english': text(required=True),
+    'italian_standard': text(required=True),
+    'part_of_speech': text(required=True, choices=(
+        'noun', 'verb', 'adjective', 'adverb', 'pronoun', 'article', 'preposition',
+        'conjunction', 'interjection', 'interrogative', 'demonstrative')),
+    'gender': text(required=True, choices=('masculine', 'feminine', 'neuter', 'n/a')),
+    'number': text(required=True, choices=('singular', 'plural', 'invariable', 'n/a')),
+    'pronunciation_simple': text(),
+    'pronunciation_ipa': text(),
+    'category': text(required=True, pattern=SNAKE_CASE_PATTERN),
+    'subcategory': text(),
+    'example_sentence_ticinese': text(),
+    'example_sentence_english': text(),
+    'example_sentence': text(),
+    'example_translation': text(),
+    'usage_notes': text(),
+    'etymology_latin': text(),
+    'etymology_notes': text(),
+    'regional_variants': array(text()),
+    'frequency': text(required=True, choices=('common', 'uncommon', 'rare', 'archaic')),
+    'corpus_frequency': integer(minimum=0),
+    'time_period': text(),
+    'source': text(),
+})
+
+PRONOUNS = record({
+    'pronoun_id': text(required=True, pattern=ID_PATTERN),
+    'type': text(required=True, choices=(
+        'personal', 'possessive', 'demonstrative', 'relative', 'interrogative',
+        'indefinite', 'impersonal')),
+    'subtype': text(),
+    'form': text(required=True),
+    'person': text(),
+    'number': text(),
+    'gender': text(),
+    'case': text(),
+    'english_equivalent': text(required=True),
+    'usage_notes': text(),
+    'examples': array(text()),
+    'pronunciation_ipa': text(),
+    'weak_clitic_required': boolean(),
+    'weak_clitic_form': text(),
+    'enclitic_form': text(),
+    'regional_variants': array(text()),
+    'placement': text(),
+    'archaic_without_article': boolean(),
+    'feminine_form': text(),
+    'grammatical_function': text(),
+})
+
+GRAMMAR_RULES = record({
+    'rule_id': text(required=True, pattern=ID_PATTERN),
+    'category': text(required=True, choices=('phonology', 'morphology', 'syntax', 'orthography')),
+    'subcategory': text(required=True, pattern=SNAKE_CASE_PATTERN),
+    'rule_name': text(required=True),
+    'description': text(required=True),
+    'examples_ticinese': array(text(), required=True),
+    'examples_english': array(text(), required=True),
+    'exceptions': text(),
+    'comparison_italian': text(),
+    'time_period': text(),
+    'source': text(),
+})
+
+STORIES = record({
+    'story_id': text(required=True, pattern=ID_PATTERN),
+    'metrics': mapping(),
+    'title': text(required=True),
+    'title_english': text(required=True),
+    'level': text(required=True, pattern=CEFR_PATTERN),
+    'word_count': integer(minimum=0),
+    'unique_words': integer(minimum=0),
+    'target_grammar': array(text()),
+    'text': text(required=True),
+    'translation': text(required=True),
+    'vocabulary_focus': array(record({
+        'ticinese': text(required=True),
+        'english': text(required=True),
+    })),
+    'comprehension_questions': array(text()),
+    'cultural_notes': text(),
+    'category': text(pattern=SNAKE_CASE_PATTERN),
+    'characters': array(text()),
+    'location': text(),
+    'cultural_period': text(),
+    'themes': array(text()),
+    'continuation_story': text(pattern=ID_PATTERN, nullable=True),
+})
+
+DIALOGUE_NODE = record({
+    'speaker': text(required=True),
+    'text': text(required=True),
+    'translation': text(required=True),
+    'responses': array(record({
+        'choice': text(required=True),
+        'translation': text(required=True),
+        'next': text(required=True),
+    })),
+    'vocabulary_learned': array(text()),
+    'cultural_note': text(),
+    'cultural_learning': array(text()),
+    'completion_note': text(),
+})
+
+SCENARIOS = record({
+    'scenario_id': text(required=True, pattern=ID_PATTERN),
+    'title': text(required=True),
+    'title_english': text(required=True),
+    'category': text(required=True, pattern=SNAKE_CASE_PATTERN),
+    'difficulty_level': text(required=True, pattern=CEFR_PATTERN),
+    'cultural_period': text(),
+    'estimated_duration': text(),
+    'setting': mapping(text()),
+    'characters': array(record({
+        'name': text(required=True),
+        'age': text(),
+        'role': text(),
+        'personality': text(),
+        'background': text(),
+        'speaking_style': text(),
+    }), required=True),
+    'vocabulary_focus': array(text()),
+    'cultural_learning': array(text()),
+    'learning_objectives': array(text()),
+    'dialogue_tree': mapping(DIALOGUE_NODE, required=True),
+})
+
+RECIPE_TERM = record({
+    'ticinese': text(required=True),
+    'english': text(required=True),
+    'cultural_note': text(),
+})
+
+RECIPES = record({
+    'recipe_id': text(required=True, pattern=ID_PATTERN),
+    'metrics': mapping(),
+    'ticinese_name': text(required=True),
+    'english_name': text(required=True),
+    'category': text(required=True, pattern=SNAKE_CASE_PATTERN),
+    'difficulty_level': text(required=True, pattern=CEFR_PATTERN),
+    'cultural_significance': text(),
+    'historical_period': text(),
+    'region': text(),
+    'season': text(),
+    'serves': text(),
+    'preparation_time': text(),
+    'cooking_time': text(),
+    'ingredients': array(record({
+        'ticinese': text(required=True),
+        'english': text(required=True),
+        'amount': text(required=True),
+        'vocabulary_id': text(),
+        'cultural_note': text(),
+    }), required=True),
+    'kitchen_tools': array(RECIPE_TERM),
+    'preservation_tools': array(RECIPE_TERM),
+    'instructions': array(record({
+        'step': integer(required=True, minimum=1),
+        'ticinese': text(required=True),
+        'english': text(required=True),
+        'vocabulary_focus': array(text()),
+        'cultural_note': text(),
+        'technique_tip': text(),
+    }), required=True),
+    'family_story': text(),
+    'vocabulary_learning': mapping(array(text())),
+    'comprehension_questions': array(record({
+        'ticinese': text(required=True),
+        'english': text(required=True),
+        'answer': text(required=True),
+    })),
+    'cultural_context': mapping(text()),
+    'learning_objectives': array(text()),
+})
+
+# Table name -> (list key, id field, schema)
+TABLES = {
+    'vocabulary': ('vocabulary', 'word_id', VOCABULARY),
+    'pronouns': ('pronouns', 'pronoun_id', PRONOUNS),
+    'grammar_rules': ('grammar_rules', 'rule_id', GRAMMAR_RULES),
+    'stories': ('stories', 'story_id', STORIES),
+    'scenarios': ('scenarios', 'scenario_id', SCENARIOS),
+    'recipes': ('recipes', 'recipe_id', RECIPES),
+}
+
+# Database file -> table
+FILES = {
+    'vocabulary_expanded.json': 'vocabulary',
+    'vocabulary.json': 'vocabulary',
+    'pronouns.json': 'pronouns',
+    'grammar_rules.json': 'grammar_rules',
+    'stories.json': 'stories',
+    'stories_backup.json': 'stories',
+    'scenarios.json': 'scenarios',
+    'recipes.json': 'recipes',
+}
+
+TYPE_NAMES = {'str': 'a string', 'int': 'an integer', 'bool': 'true/false',
+              'list': 'a list', 'map': 'an object', 'object': 'an object'}
+TYPE_TESTS = {'str': 'str', 'int': 'int', 'bool': 'bool', 'list': 'list', 'map': 'dict', 'object': 'dict'}
+
+
+def path_literal(path):
+    """Source for a field path; paths holding list indexes or keys become f-strings"""
+    return ('f' if '{' in path else '') + repr(path)
+
+
+class SchemaCompiler:
+    """Generates the source of check(value, report) for one schema"""
+
+    def __init__(self):
+        self.constants = {}
+        self.variables = 0
+
+    def constant(self, value):
+        name = f'K{len(self.constants)}'
+        self.constants[name] = value
+        return name
+
+    def variable(self, prefix):
+        self.variables += 1
+        return f'{prefix}{self.variables}'
+
+    def compile(self, schema):
+        lines = ['def check(v0, report):']
+        lines += self.checks(schema, 'v0', '', 1) or ['    pass']
+        return '\n'.join(lines) + '\n'
+
+    def checks(self, spec, var, path, depth):
+        """Lines validating var (already known to be present) against spec"""
+        pad = '    ' * depth
+        where = path_literal(path)
+        lines = [f'{pad}if type({var}) is not {TYPE_TESTS[spec["type"]]}:']
+        if spec.get('nullable'):
+            lines[0] = f'{pad}if {var} is not None and type({var}) is not {TYPE_TESTS[spec["type"]]}:'
+        lines.append(f"{pad}    report('error', {where}, 'expected {TYPE_NAMES[spec['type']]}, got ' + type({var}).__name__)")
+
+        body = self.value_checks(spec, var, path, depth + 1)
+        if body:
+            if spec.get('nullable'):
+                lines.append(f'{pad}elif {var} is not None:')
+            else:
+                lines.append(f'{pad}else:')
+            lines += body
+        return lines
+
+    def value_checks(self, spec, var, path, depth):
+        pad = '    ' * depth
+        where = path_literal(path)
+        kind = spec['type']
+        lines = []
+        if kind == 'str':
+            tests = []
+            if spec['required']:
+                tests.append((f'not {var}.strip()', "'must not be empty'"))
+            if spec['choices']:
+                allowed = self.constant(frozenset(spec['choices']))
+                tests.append((f'{var} not in {allowed}',
+                               f"'unexpected value ' + repr({var})"))
+            if spec['pattern']:
+                match = self.constant(re.compile(spec['pattern']).match)
+                tests.append((f'not {match}({var})',
+                               f"repr({var}) + {' does not match ' + spec['pattern']!r}"))
+            for i, (test, message) in enumerate(tests):
+                lines.append(f"{pad}{'if' if i == 0 else 'elif'} {test}:")
+                lines.append(f"{pad}    report('error', {where}, {message})")
+        elif kind == 'int':
+            if spec['minimum'] is not None:
+                lines.append(f"{pad}if {var} < {spec['minimum']}:")
+                lines.append(f"{pad}    report('error', {where}, 'must be at least {spec['minimum']}, got ' + str({var}))")
+        elif kind == 'list' and spec['items']:
+            index, item = self.variable('i'), self.variable('v')
+            lines.append(f'{pad}for {index}, {item} in enumerate({var}):')
+            lines += self.checks(spec['items'], item, f'{path}[{{{index}}}]', depth + 1)
+        elif kind == 'map' and spec['values']:
+            key, item = self.variable('k'), self.variable('v')
+            lines.append(f'{pad}for {key}, {item} in {var}.items():')
+            lines += self.checks(spec['values'], item, f'{path}.{{{key}}}' if path else f'{{{key}}}', depth + 1)
+        elif kind == 'object':
+            for name, field in spec['fields'].items():
+                item = self.variable('v')
+                field_path = f'{path}.{name}' if path else name
+                lines.append(f'{pad}{item} = {var}.get({name!r}, MISSING)')
+                if field['required']:
+                    lines.append(f'{pad}if {item} is MISSING:')
+                    lines.append(f"{pad}    report('error', {path_literal(field_path)}, 'missing required field')")
+                    lines.append(f'{pad}else:')
+                else:
+                    lines.append(f'{pad}if {item} is not MISSING:')
+                lines += self.checks(field, item, field_path, depth + 1)
+            known = self.constant(frozenset(spec['fields']))
+            key = self.variable('k')
+            lines.append(f'{pad}if not {known}.issuperset({var}):')
+            lines.append(f'{pad}    for {key} in {var}:')
+            lines.append(f'{pad}        if {key} not in {known}:')
+            key_path = f'{path}.{{{key}}}' if path else f'{{{key}}}'
+            lines.append(f"{pad}            report('warning', {path_literal(key_path)}, 'unknown field')")
+        return lines
+
+
+@lru_cache(maxsize=None)
+def compiled_source(table):
+    compiler = SchemaCompiler()
+    return compiler.compile(TABLES[table][2]), compiler.constants
+
+
+@lru_cache(maxsize=None)
+def compile_schema(table):
+    """check(record, report) for a table, compiled once per process"""
+    source, constants = compiled_source(table)
+    namespace = dict(constants, MISSING=object())
+    exec(compile(source, f'<schema {table}>', 'exec'), namespace)
+    return namespace['check']
+
+
+def italian_copies_english(record, report, context):
+    italian, english = record.get('italian_standard'), record.get('english')
+    if isinstance(italian, str) and isinstance(english, str) and italian.strip() \
+            and italian.strip().lower() == english.strip().lower():
+        report('warning', 'italian_standard', f'same as english ({english!r}), not an Italian equivalent')
+
+
+def subject_pronoun_part_of_speech(record, report, context):
+    form = record.get('ticinese')
+    if isinstance(form, str) and record.get('part_of_speech') != 'pronoun' \
+            and fold(form) in context['subject_pronouns']:
+        report('warning', 'part_of_speech',
+               f"{record.get('part_of_speech')!r}, but {form!r} is a subject pronoun in pronouns.json")
+
+
+def grammar_examples_paired(record, report, context):
+    ticinese, english = record.get('examples_ticinese'), record.get('examples_english')
+    if isinstance(ticinese, list) and isinstance(english, list) and len(ticinese) != len(english):
+        report('warning', 'examples_english',
+               f'{len(english)} translations for {len(ticinese)} examples_ticinese')
+
+
+# Content checks run on every record after the schema check
+CONTENT_CHECKS = {
+    'vocabulary': (italian_copies_english, subject_pronoun_part_of_speech),
+    'grammar_rules': (grammar_examples_paired,),
+}
+
+
+def build_context(database_dir):
+    """Data the content checks need from other files, loaded once in the parent"""
+    try:
+        pronouns = load_database('pronouns.json', 'pronouns', database_dir)
+    except FileNotFoundError:
+        pronouns = []
+    subject_pronouns = set()
+    for pronoun in pronouns:
+        if pronoun.get('type') == 'personal' and pronoun.get('case') == 'subject':
+            subject_pronouns.update(fold(form.strip("'")) for form in pronoun.get('form', '').split('/'))
+    return {'subject_pronouns': subject_pronouns}
+
+
+def iter_records(path, list_key, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield the records of the top-level list_key array one at a time
+
+    The file is read in chunks and each record is decoded as soon as it
+    is complete, so memory holds one chunk and one record, not the file.
+    """
+    decoder = json.JSONDecoder()
+    opening = re.compile(r'"%s"\s*:\s*\[' % re.escape(list_key))
+    whitespace = re.compile(r'\s*')
+    with open(path, encoding='utf-8') as f:
+        buffer = f.read(chunk_size)
+        eof = not buffer
+        match = opening.search(buffer)
+        while not match:
+            if eof:
+                raise ValueError(f'no "{list_key}" list')
+            more = f.read(chunk_size)
+            eof = not more
+            buffer += more
+            match = opening.search(buffer)
+
+        position = match.end()
+        expect_comma = False
+        while True:
+            position = whitespace.match(buffer, position).end()
+            if position == len(buffer):
+                if eof:
+                    raise ValueError(f'"{list_key}" list is not closed')
+                buffer, position = f.read(chunk_size), 0
+                eof = not buffer
+                continue
+            char = buffer[position]
+            if char == ']':
+                return
+            if expect_comma:
+                if char != ',':
+                    raise ValueError(f'expected "," or "]" in "{list_key}", got {char!r}')
+                position += 1
+                expect_comma = False
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # The record continues in the next chunk
+                more = f.read(chunk_size)
+                eof = not more
+                buffer, position = buffer[position:] + more, 0
+                continue
+            yield item
+            position = end
+            expect_comma = True
+
+
+def validate_file(path, table, context):
+    """Validate one database file; runs in a worker process"""
+    start = time.perf_counter()
+    list_key, id_field, _ = TABLES[table]
+    check = compile_schema(table)
+    content_checks = CONTENT_CHECKS.get(table, ())
+    violations = []
+    first_seen = {}
+    count = 0
+    try:
+        for count, item in enumerate(iter_records(path, list_key), 1):
+            record_id = item.get(id_field) if isinstance(item, dict) else None
+            label = record_id if isinstance(record_id, str) and record_id else f'#{count}'
+
+            def report(severity, field, message, label=label):
+                violations.append((severity, label, field, message))
+
+            check(item, report)
+            if not isinstance(item, dict):
+                continue
+            for content_check in content_checks:
+                content_check(item, report, context)
+            if isinstance(record_id, str):
+                if record_id in first_seen:
+                    report('error', id_field, f'duplicate id (first used by record #{first_seen[record_id]})')
+                else:
+                    first_seen[record_id] = count
+    except (OSError, ValueError) as e:
+        violations.append(('error', '', '', f'cannot read: {e}'))
+    return {
+        'file': os.path.basename(path),
+        'table': table,
+        'records': count,
+        'seconds': round(time.perf_counter() - start, 3),
+        'violations': violations,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('files', nargs='*', help="database files to check (default: all known ones present)")
+    parser.add_argument('--database-dir', default=DATABASE_DIR)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--strict', action='store_true', help="fail on warnings too")
+    parser.add_argument('--summary', action='store_true', help="only print the per-file counts")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    parser.add_argument('--show-code', metavar='TABLE', choices=sorted(TABLES),
+                        help="print the compiled check function of a table and exit")
+    args = parser.parse_args(argv)
+
+    if args.show_code:
+        print(compiled_source(args.show_code)[0], end='')
+        return 0
+
+    names = args.files or [name for name in FILES if os.path.exists(database_path(name, args.database_dir))]
+    unknown = [name for name in names if os.path.basename(name) not in FILES]
+    if unknown:
+        parser.error(f"no schema for: {', '.join(unknown)}")
+    paths = [name if os.path.dirname(name) else database_path(name, args.database_dir) for name in names]
+    tables = [FILES[os.path.basename(path)] for path in paths]
+
+    start = time.perf_counter()
+    context = build_context(args.database_dir)
+    with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(paths)))) as pool:
+        results = list(pool.map(validate_file, paths, tables, repeat(context)))
+    elapsed = time.perf_counter() - start
+
+    errors = sum(1 for result in results for v in result['violations'] if v[0] == 'error')
+    warnings = sum(1 for result in results for v in result['violations'] if v[0] == 'warning')
+    if args.json:
+        print(json.dumps({'files': [dict(result, violations=[
+            dict(zip(('severity', 'record', 'field', 'message'), v)) for v in result['violations']])
+            for result in results]}, ensure_ascii=False, indent=2))
+    else:
+        for result in results:
+            if not args.summary:
+                for severity, label, field, message in result['violations']:
+                    print(f"{result['file']}: {label}: {field}: {severity}: {message}")
+            file_errors = sum(1 for v in result['violations'] if v[0] == 'error')
+            print(f"{result['file']}: {result['records']} records, {file_errors} errors, "
+                  f"{len(result['violations']) - file_errors} warnings ({result['seconds']:.2f}s)",
+                  file=sys.stderr)
+        print(f"Validated {sum(r['records'] for r in results)} records in {len(results)} files: "
+              f"{errors} errors, {warnings} warnings ({elapsed:.2f}s)", file=sys.stderr)
+
+    return 1 if errors or (args.strict and warnings) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())